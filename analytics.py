@@ -0,0 +1,183 @@
+# === Analítica por curso y colegio ===
+# Una consulta trae el promedio de cada matrícula del año (enrollment_stats) con
+# su estudiante, asignatura y curso (student_courses/courses); la nota chilena y
+# todas las estadísticas se calculan en NumPy sobre esos arreglos en una pasada:
+# ordenar por (grupo, nota) una vez da media, percentiles y tasa de reprobación
+# de todos los grupos a la vez. El resultado queda en caché por (año, escala)
+# hasta que cambien las tablas de origen.
+#
+# Uso:  python analytics.py --year 2025    -> resumen por asignatura y tiempo de cálculo
+#       python analytics.py check          -> compara percentiles agrupados con np.percentile
+import argparse, sys, time
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from cache import Memo
+from db import query_cache, read_conn
+from grading import pct_to_chilean_array, round1
+
+PASS_NOTE = 4.0
+QUANTILES = {"p10":0.10, "p25":0.25, "mediana":0.50, "p75":0.75, "p90":0.90}
+# Tablas de las que depende el resumen (enrollment_stats cubre grades/assessments)
+_TABLES = ("enrollments", "enrollment_stats", "students", "subjects", "courses", "student_courses")
+
+YEAR_SQL = """
+    SELECT e.student_id, e.subject_id, COALESCE(sc.course_id, 0) AS course_id,
+           es.sum_wpct / es.sum_weight AS prom
+    FROM enrollments e
+    JOIN enrollment_stats es ON es.enrollment_id=e.id
+    LEFT JOIN (SELECT sc.student_id, MIN(sc.course_id) AS course_id
+               FROM student_courses sc JOIN courses c ON c.id=sc.course_id
+               WHERE c.year=:y GROUP BY sc.student_id) sc ON sc.student_id=e.student_id
+    WHERE e.year=:y AND es.n > 0 AND es.sum_weight <> 0
+"""
+
+def grouped_stats(groups, values, n_groups, threshold=PASS_NOTE):
+    """n, media, percentiles (interpolación lineal, como np.percentile) y tasa bajo
+    `threshold` de `values` por grupo. `groups` son códigos 0..n_groups-1; NaN no cuenta."""
+    groups = np.asarray(groups, dtype=np.intp)
+    values = np.asarray(values, dtype=float)
+    ok = ~np.isnan(values)
+    g, v = groups[ok], values[ok]
+    order = np.lexsort((v, g))
+    g, v = g[order], v[order]
+    n = np.bincount(g, minlength=n_groups)
+    start = np.cumsum(n) - n
+    empty = n == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = {"n":n, "media":np.bincount(g, weights=v, minlength=n_groups) / n}
+        for name, qv in QUANTILES.items():
+            pos = start + qv * np.maximum(n - 1, 0)
+            lo = np.floor(pos).astype(np.intp)
+            hi = np.ceil(pos).astype(np.intp)
+            if v.size:
+                lo, hi = np.minimum(lo, v.size - 1), np.minimum(hi, v.size - 1)
+                val = v[lo] + (v[hi] - v[lo]) * (pos - lo)
+            else:
+                val = np.full(n_groups, np.nan)
+            out[name] = np.where(empty, np.nan, val)
+        out["reprobación_%"] = np.bincount(g, weights=(v < threshold), minlength=n_groups) / n * 100
+    return out
+
+def _table(labels, stats, label_cols):
+    df = pd.DataFrame(labels, columns=label_cols)
+    for k, arr in stats.items():
+        df[k] = arr if k == "n" else np.round(arr, 2)
+    return df[df["n"] > 0].reset_index(drop=True)
+
+def load_year(conn, year):
+    """Arreglos del año (promedio por matrícula con estudiante, asignatura y curso) y nombres."""
+    res = conn.execute(text(YEAR_SQL), {"y":int(year)})
+    arr = pd.DataFrame(res.fetchall(), columns=list(res.keys())).to_numpy(dtype=float).reshape(-1, 4)
+    names = lambda sql: dict(conn.execute(text(sql), {"y":int(year)}).fetchall())
+    data = {"student":arr[:, 0].astype(np.int64), "subject":arr[:, 1].astype(np.int64),
+            "course":arr[:, 2].astype(np.int64), "pct":np.round(arr[:, 3] * 100, 2),
+            "subjects":names("SELECT id, name FROM subjects"),
+            "courses":{0:"(sin curso)", **names("SELECT id, name FROM courses WHERE year=:y")},
+            # Cantidad de asignaturas de la malla de cada curso
+            "malla":names("""SELECT cs.course_id, COUNT(*) FROM course_subjects cs
+                             JOIN courses c ON c.id=cs.course_id WHERE c.year=:y GROUP BY cs.course_id"""),
+            "students":names("""SELECT id, first_name||' '||last_name FROM students
+                                WHERE id IN (SELECT student_id FROM enrollments WHERE year=:y)""")}
+    for v in data.values():
+        if isinstance(v, np.ndarray):
+            v.flags.writeable = False
+    return data
+
+def summarize(data, scale):
+    """Estadísticas del año para la escala dada. Retorna un dict de DataFrames."""
+    min_note, pass_pct, max_note = scale
+    note = pct_to_chilean_array(data["pct"], min_note, pass_pct, max_note)
+    student, subject, course = data["student"], data["subject"], data["course"]
+    subj_names, course_names = data["subjects"], data["courses"]
+
+    s_ids, s_code = np.unique(subject, return_inverse=True)
+    c_ids, c_code = np.unique(course, return_inverse=True)
+    out = {}
+    out["por_asignatura"] = _table([[subj_names.get(i, i)] for i in s_ids.tolist()],
+                                   grouped_stats(s_code, note, len(s_ids)), ["asignatura"])
+    out["por_curso"] = _table([[course_names.get(i, i), data["malla"].get(i, 0)] for i in c_ids.tolist()],
+                              grouped_stats(c_code, note, len(c_ids)), ["curso", "asignaturas_malla"])
+    # Curso × asignatura: código combinado
+    cs_code = c_code * len(s_ids) + s_code
+    labels = [[course_names.get(c, c), subj_names.get(s, s)] for c in c_ids.tolist() for s in s_ids.tolist()]
+    out["curso_asignatura"] = _table(labels, grouped_stats(cs_code, note, len(labels)), ["curso", "asignatura"])
+
+    # Ranking: promedio simple de las notas por asignatura (como en los informes)
+    st_ids, st_code = np.unique(student, return_inverse=True)
+    n_sub = np.bincount(st_code, minlength=len(st_ids))
+    general = round1(np.bincount(st_code, weights=note, minlength=len(st_ids)) / np.maximum(n_sub, 1))
+    failing = np.bincount(st_code, weights=(note < PASS_NOTE), minlength=len(st_ids)).astype(int)
+    st_course = np.zeros(len(st_ids), dtype=np.int64)
+    st_course[st_code] = course
+    rank = pd.DataFrame({"student_id":st_ids, "estudiante":[data["students"].get(i) for i in st_ids.tolist()],
+                         "curso":[course_names.get(c, c) for c in st_course.tolist()],
+                         "promedio":general, "asignaturas":n_sub, "reprobadas":failing})
+    rank["lugar_colegio"] = rank["promedio"].rank(ascending=False, method="min").astype(int)
+    rank["lugar_curso"] = rank.groupby("curso")["promedio"].rank(ascending=False, method="min").astype(int)
+    out["ranking"] = rank.sort_values(["lugar_colegio", "estudiante"]).reset_index(drop=True)
+
+    out["colegio"] = {"estudiantes":len(st_ids), "matrículas":len(note),
+                      "media":round(float(np.mean(note)), 2) if len(note) else float("nan"),
+                      "reprobación_%":round(float(np.mean(note < PASS_NOTE) * 100), 2) if len(note) else 0.0,
+                      "en_riesgo":int((failing > 0).sum())}
+    return out
+
+# Los datos del año no dependen de la escala: cambiarla sólo recalcula en NumPy
+_years = Memo(maxsize=4)
+_summaries = Memo(maxsize=16)
+
+def year_summary(year, scale):
+    """Resumen del año con caché por (año, escala), válido hasta que cambien las tablas."""
+    year, scale = int(year), tuple(float(x) for x in scale)
+    gen = query_cache.generation(_TABLES)
+
+    def fetch():
+        with read_conn(year) as conn:
+            return load_year(conn, year)
+    return _summaries.get_or_build((year, scale), gen,
+                                   lambda: summarize(_years.get_or_build(year, gen, fetch), scale))
+
+def self_check(n=5000, n_groups=37, seed=0):
+    """Compara grouped_stats con np.percentile/np.mean por grupo. Retorna discrepancias."""
+    rng = np.random.default_rng(seed)
+    groups = rng.integers(0, n_groups, n)
+    values = round1(rng.uniform(1, 7, n))
+    values[rng.random(n) < 0.05] = np.nan
+    stats = grouped_stats(groups, values, n_groups + 2)
+    bad = []
+    for k in range(n_groups + 2):
+        v = values[(groups == k) & ~np.isnan(values)]
+        want = {"n":len(v), "media":v.mean() if len(v) else np.nan,
+                "reprobación_%":(v < PASS_NOTE).mean() * 100 if len(v) else np.nan}
+        want.update({name: np.percentile(v, qv * 100) if len(v) else np.nan for name, qv in QUANTILES.items()})
+        for name, w in want.items():
+            got = stats[name][k]
+            if not (np.isnan(w) and np.isnan(got)) and abs(got - w) > 1e-9:
+                bad.append((k, name, w, float(got)))
+    return bad
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["check"]:
+        bad = self_check()
+        for b in bad[:20]:
+            print(b)
+        print(f"{len(bad)} discrepancias.")
+        sys.exit(1 if bad else 0)
+    ap = argparse.ArgumentParser(description="Analítica del año por asignatura, curso y estudiante.")
+    ap.add_argument("--year", type=int, required=True)
+    args = ap.parse_args()
+
+    from db import init_db
+    init_db()
+    t0 = time.perf_counter()
+    summary = year_summary(args.year, (1.0, 60, 7.0))
+    t1 = time.perf_counter()
+    year_summary(args.year, (1.0, 50, 7.0))
+    t2 = time.perf_counter()
+    year_summary(args.year, (1.0, 50, 7.0))
+    t3 = time.perf_counter()
+    print(summary["por_asignatura"].to_string(index=False))
+    print(summary["colegio"])
+    print(f"cálculo {t1 - t0:.3f}s, otra escala {t2 - t1:.3f}s, desde caché {(t3 - t2) * 1000:.2f} ms",
+          file=sys.stderr)
@@ -0,0 +1,159 @@
+# === Archivo de años cerrados ===
+# Un año cerrado sale de la base principal a su propio archivo SQLite
+# (school_2023.db junto a school.db) con sus matrículas, promedios
+# (enrollment_stats), evaluaciones y notas; estudiantes, asignaturas y cursos
+# quedan en la principal. Al leer un año archivado, db.read_conn(año) adjunta el
+# archivo en sólo lectura y las consultas de la app no cambian (ver db.py).
+#
+# El cierre es en dos pasos para no tomar el candado de escritura mientras se copia:
+#   1. Se copia el año al archivo desde una instantánea de lectura, anotando la
+#      marca de change_log de esa instantánea.
+#   2. Un trabajo exclusivo del escritor verifica en change_log que matrículas,
+#      evaluaciones y notas no cambiaron desde la marca (si cambiaron, se repite),
+#      borra el año de la principal y lo registra en archived_years.
+# Los borrados del cierre no quedan en change_log: el año no se eliminó, cambió
+# de archivo; sus cambios aún no exportados (hasta la marca guardada en
+# archived_years.log_seq) tampoco salen como eliminaciones: changes.export los omite. Si se cierra desde la línea de comandos con la app
+# corriendo, la app ve el cambio al expirar su caché; es preferible cerrar desde
+# Rendimiento.
+#
+# Uso:  python archive.py close 2023 [--vacuum]   -> archiva el año
+#       python archive.py list                     -> años archivados
+import argparse, json, os, sqlite3, sys, time
+from datetime import date
+from sqlalchemy import text
+from db import ARCHIVED_TABLES, DB_PATH, archive_path, archived_years, engine, q, write
+
+class ArchiveError(Exception):
+    pass
+
+# Tablas del archivo en orden de copia; {y} es el año. Una evaluación con notas
+# en otros años se copia pero no se borra de la principal.
+COPY_SQL = {
+    "enrollments": "SELECT * FROM hot.enrollments WHERE year = {y}",
+    "enrollment_stats": "SELECT es.* FROM hot.enrollment_stats es JOIN enrollments e ON e.id = es.enrollment_id",
+    "grades": "SELECT g.* FROM hot.grades g JOIN enrollments e ON e.id = g.enrollment_id",
+    "assessments": """SELECT a.* FROM hot.assessments a
+                      WHERE a.id IN (SELECT assessment_id FROM grades)
+                         OR (substr(a.date, 1, 4) = '{y}'
+                             AND NOT EXISTS (SELECT 1 FROM hot.grades g WHERE g.assessment_id = a.id))""",
+}
+_CHECKED = ("enrollments", "assessments", "grades")
+
+def _copy(year, dest):
+    """Paso 1: copia el año a `dest`. Retorna (marca de change_log, conteos por tabla)."""
+    if os.path.exists(dest):
+        os.remove(dest)
+    # sqlite3 directo: ATTACH y BEGIN explícitos, fuera del pool y del escritor
+    conn = sqlite3.connect(dest, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS hot", (DB_PATH,))
+        conn.execute("BEGIN")
+        # Lo primero que se lee de hot fija la instantánea de toda la copia
+        mark = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM hot.change_log").fetchone()[0]
+        counts = {}
+        for table in ARCHIVED_TABLES:
+            for (ddl,) in conn.execute("""SELECT sql FROM hot.sqlite_master
+                                          WHERE tbl_name = ? AND type IN ('table', 'index') AND sql IS NOT NULL
+                                          ORDER BY type = 'index'""", (table,)).fetchall():
+                conn.execute(ddl)
+        for table, select in COPY_SQL.items():
+            counts[table] = conn.execute(f"INSERT INTO {table} {select.format(y=int(year))}").rowcount
+        conn.execute("COMMIT")
+        conn.execute("DETACH DATABASE hot")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return mark, counts
+
+def _finish(year, mark, counts, dest):
+    """Paso 2 (trabajo exclusivo del escritor): borra el año de la principal y lo registra."""
+    assessments = json.dumps(_ids(dest, "assessments"))
+    def job(conn):
+        changed = conn.execute(text(
+            f"SELECT COUNT(*) FROM change_log WHERE seq > :m AND tbl IN {_CHECKED}"), {"m":mark}).scalar()
+        if changed:
+            raise ArchiveError(f"{changed} cambios durante la copia")
+        before = conn.execute(text("SELECT COALESCE(MAX(seq), 0) FROM change_log")).scalar()
+        # Notas y promedios se van en cascada (ON DELETE CASCADE)
+        n = conn.execute(text("DELETE FROM enrollments WHERE year = :y"), {"y":year}).rowcount
+        if n != counts["enrollments"]:
+            raise ArchiveError(f"se copiaron {counts['enrollments']} matrículas pero se borrarían {n}")
+        conn.execute(text("""DELETE FROM assessments WHERE id IN (SELECT value FROM json_each(:ids))
+                             AND NOT EXISTS (SELECT 1 FROM grades g WHERE g.assessment_id = assessments.id)"""),
+                     {"ids":assessments})
+        conn.execute(text("DELETE FROM change_log WHERE seq > :b"), {"b":before})
+        # log_seq: los cambios pendientes hasta aquí de filas que ahora sólo están en
+        # el archivo no se exportan como eliminaciones (changes._archived_ids)
+        conn.execute(text("""INSERT INTO archived_years(year, path, enrollments, assessments, grades, archived_at, log_seq)
+                             VALUES(:y, :p, :e, :a, :g, :t, :b)"""),
+                     {"y":year, "p":os.path.basename(dest), "e":counts["enrollments"],
+                      "a":counts["assessments"], "g":counts["grades"],
+                      "t":time.strftime("%Y-%m-%dT%H:%M:%S"), "b":before})
+    write(job, exclusive=True)
+
+def _ids(path, table):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return [r[0] for r in conn.execute(f"SELECT id FROM {table}")]
+    finally:
+        conn.close()
+
+def close_year(year, attempts=3, vacuum=False):
+    """Archiva `year` (un año anterior al actual). Retorna los conteos movidos y tiempos."""
+    year = int(year)
+    if year >= date.today().year:
+        raise ArchiveError(f"El año {year} sigue abierto: sólo se archivan años anteriores.")
+    if year in archived_years():
+        raise ArchiveError(f"El año {year} ya está archivado.")
+    if q("SELECT COUNT(*) AS n FROM enrollments WHERE year=:y", {"y":year}, cached=False)["n"].iloc[0] == 0:
+        raise ArchiveError(f"No hay matrículas de {year} en la base principal.")
+    dest = archive_path(year)
+    tmp = dest + ".tmp"
+    t0 = time.perf_counter()
+    for attempt in range(1, attempts + 1):
+        mark, counts = _copy(year, tmp)
+        t1 = time.perf_counter()
+        os.replace(tmp, dest)
+        try:
+            _finish(year, mark, counts, dest)
+            break
+        except ArchiveError:
+            # Cambió algo del año (o la base) durante la copia: se vuelve a copiar
+            if attempt == attempts:
+                os.remove(dest)
+                raise
+    t2 = time.perf_counter()
+    if vacuum:
+        # Devuelve al sistema las páginas liberadas; toma la base unos segundos
+        with engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return dict(counts, copia_s=round(t1 - t0, 3), cierre_s=round(t2 - t1, 3),
+                vacuum_s=round(time.perf_counter() - t2, 3) if vacuum else None,
+                archivo=dest, archivo_mb=round(os.path.getsize(dest) / 2**20, 1))
+
+def listing():
+    return q("SELECT year, path, enrollments, assessments, grades, archived_at FROM archived_years ORDER BY year DESC")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Archivo de años cerrados.")
+    ap.add_argument("cmd", choices=["close", "list"])
+    ap.add_argument("year", type=int, nargs="?")
+    ap.add_argument("--vacuum", action="store_true", help="Compactar la base principal al terminar.")
+    args = ap.parse_args()
+
+    from db import init_db
+    init_db()
+    if args.cmd == "list":
+        print(listing().to_string(index=False))
+        sys.exit(0)
+    if args.year is None:
+        ap.error("close requiere el año")
+    size = os.path.getsize(DB_PATH)
+    try:
+        r = close_year(args.year, vacuum=args.vacuum)
+    except ArchiveError as e:
+        sys.exit(f"No se archivó: {e}")
+    print(r)
+    print(f"base principal: {size / 2**20:.1f} MB -> {os.path.getsize(DB_PATH) / 2**20:.1f} MB", file=sys.stderr)
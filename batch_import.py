@@ -0,0 +1,224 @@
+# === Importación de varios cursos (libro o ZIP) ===
+# Acepta un libro con una hoja por curso (nombre de la hoja = curso, columnas de
+# estudiantes) y una hoja `asignaturas` compartida, con una columna opcional
+# `curso` para limitar una asignatura a ciertos cursos; o un ZIP de planillas de
+# un curso en el formato habitual (nombre del archivo = curso).
+# Cada curso se lee y valida en un pool de procesos; los resultados se aplican
+# en orden por el escritor único (db.write), una transacción por curso, así
+# SQLite nunca ve escrituras concurrentes y un curso con errores no afecta a los demás.
+#
+# Uso:  python batch_import.py cursos.xlsx|cursos.zip --year 2025 [--workers 4]
+import argparse, multiprocessing, os, shutil, sys, tempfile, time, zipfile
+from concurrent.futures import ProcessPoolExecutor
+from importer import (STUDENT_COLS, SUBJECT_COLS, _clean_students, _clean_subjects,
+                      _rewind, import_records, sheet_rows)
+
+SHARED = "asignaturas"
+RESULT_COLS = ["curso","fuente","estado","estudiantes","nuevos","descartados","asignaturas",
+               "lectura_s","escritura_s","detalle"]
+
+def _source_name(src):
+    return os.path.basename(str(src if isinstance(src, (str, os.PathLike)) else getattr(src, "name", ""))) or "carga"
+
+def _materialize(src, tmp):
+    # Los workers abren el libro por ruta; un archivo subido se copia a disco una vez
+    if isinstance(src, (str, os.PathLike)):
+        return str(src)
+    path = os.path.join(tmp, _source_name(src))
+    f = _rewind(src)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(f, out)
+    f.seek(0)
+    return path
+
+def _workbook_tasks(path, fuente, course=None):
+    """Un trabajo por curso del libro. `course` = libro de un curso (hoja `estudiantes`)."""
+    from openpyxl import load_workbook
+    try:
+        wb = load_workbook(path, read_only=True)
+        sheets = wb.sheetnames
+        wb.close()
+    except Exception as e:
+        return [{"fuente":fuente, "path":path, "sheet":None, "curso":course or fuente,
+                 "error":f"No se pudo abrir el libro: {e}"}]
+    if course is not None:
+        if "estudiantes" not in sheets:
+            return [{"fuente":fuente, "path":path, "sheet":None, "curso":course,
+                     "error":"Falta la hoja 'estudiantes'."}]
+        return [{"fuente":fuente, "path":path, "sheet":"estudiantes", "curso":course, "error":None}]
+    if "estudiantes" in sheets:
+        raise ValueError("El libro tiene una hoja 'estudiantes': es de un solo curso. "
+                         "Use la importación de un curso o un ZIP de planillas.")
+    if SHARED not in sheets:
+        raise ValueError(f"Falta la hoja '{SHARED}'.")
+    return [{"fuente":fuente, "path":path, "sheet":s, "curso":s.strip(), "error":None}
+            for s in sheets if s != SHARED]
+
+def _is_bundle(path):
+    # Un .xlsx también es un ZIP; el paquete de planillas no trae [Content_Types].xml
+    if not zipfile.is_zipfile(path):
+        return False
+    with zipfile.ZipFile(path) as zf:
+        return "[Content_Types].xml" not in zf.namelist()
+
+def plan(src, tmp):
+    """Trabajos (uno por curso) de un libro de varios cursos o de un ZIP de planillas."""
+    path = _materialize(src, tmp)
+    fuente = _source_name(src)
+    if not _is_bundle(path):
+        tasks = _workbook_tasks(path, fuente)
+    else:
+        tasks = []
+        with zipfile.ZipFile(path) as zf:
+            members = sorted(m for m in zf.namelist()
+                             if m.lower().endswith(".xlsx") and not m.startswith("__MACOSX/")
+                             and not os.path.basename(m).startswith("~$"))
+            for m in members:
+                dest = zf.extract(m, os.path.join(tmp, "zip"))
+                course = os.path.splitext(os.path.basename(m))[0].strip()
+                tasks.extend(_workbook_tasks(dest, m, course))
+    seen = set()
+    for t in tasks:
+        key = t["curso"].lower()
+        if not t["error"] and key in seen:
+            t["error"] = "Curso repetido en la carga."
+        seen.add(key)
+    return tasks
+
+def _parse_course(task, wb, shared):
+    t0 = time.perf_counter()
+    out = {"curso":task["curso"], "fuente":task["fuente"], "students":[], "subjects":[],
+           "rejected":0, "errors":[], "warnings":[]}
+    try:
+        if task["error"]:
+            raise ValueError(task["error"])
+        _, rows = sheet_rows(wb, task["sheet"], STUDENT_COLS, ["first_name","last_name"])
+        out["students"], out["rejected"] = _clean_students(list(rows))
+        mine = [{c: r[c] for c in SUBJECT_COLS} for r in shared
+                if not r["curso"] or r["curso"].lower() == task["curso"].lower()]
+        out["subjects"] = _clean_subjects(mine)
+    except ValueError as e:
+        out["errors"].append(str(e))
+    except Exception as e:
+        out["errors"].append(f"No se pudo leer: {e}")
+    else:
+        if not task["curso"]:
+            out["errors"].append("Curso sin nombre.")
+        if not out["students"]:
+            out["errors"].append("Sin estudiantes válidos (first_name y last_name).")
+        if not out["subjects"]:
+            out["errors"].append("Sin asignaturas para el curso.")
+        runs = [s["run"] for s in out["students"] if s["run"]]
+        if len(runs) != len(set(runs)):
+            out["warnings"].append(f"{len(runs) - len(set(runs))} RUN repetidos (se importan una vez).")
+        if out["rejected"]:
+            out["warnings"].append(f"{out['rejected']} filas sin nombre/apellido descartadas.")
+    out["parse_s"] = round(time.perf_counter() - t0, 4)
+    return out
+
+def parse_batch(batch):
+    """Lee y valida cursos de un mismo libro (corre en un proceso del pool, sin base de datos).
+
+    El libro y su hoja `asignaturas` se abren una sola vez por lote: abrir el libro
+    cuesta mucho más que leer la hoja de un curso."""
+    from openpyxl import load_workbook
+    t0 = time.perf_counter()
+    wb, shared, error = None, [], None
+    if not all(t["error"] for t in batch):
+        try:
+            wb = load_workbook(batch[0]["path"], read_only=True, data_only=True)
+            _, rows = sheet_rows(wb, SHARED, SUBJECT_COLS + ["curso"], SUBJECT_COLS)
+            shared = list(rows)
+        except ValueError as e:
+            error = str(e)
+        except Exception as e:
+            error = f"No se pudo leer: {e}"
+    opened = time.perf_counter() - t0
+    try:
+        out = [_parse_course(dict(t, error=t["error"] or error), wb, shared) for t in batch]
+    finally:
+        if wb is not None:
+            wb.close()
+    # El costo de abrir el libro se reparte entre los cursos del lote
+    for o in out:
+        o["parse_s"] = round(o["parse_s"] + opened / len(out), 4)
+    return out
+
+def _batches(tasks, workers):
+    """Agrupa cursos consecutivos del mismo libro en a lo más `workers` lotes por libro."""
+    groups = []
+    for t in tasks:
+        if groups and groups[-1][0]["path"] == t["path"]:
+            groups[-1].append(t)
+        else:
+            groups.append([t])
+    out = []
+    for g in groups:
+        size = -(-len(g) // min(workers, len(g)))
+        out.extend(g[i:i + size] for i in range(0, len(g), size))
+    return out
+
+def _parsed(tasks, workers):
+    batches = _batches(tasks, workers)
+    if workers <= 1:
+        for b in batches:
+            yield from parse_batch(b)
+        return
+    # forkserver y no fork: dentro del servidor de Streamlit (con el hilo escritor)
+    # un hijo de fork puede heredar un candado tomado y quedar bloqueado
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+        # map entrega en orden: el escritor aplica un lote mientras se leen los siguientes
+        for out in pool.map(parse_batch, batches):
+            yield from out
+
+def import_many(write, src, year, workers=None, progress=None):
+    """Importa todos los cursos de `src` (ruta o archivo .xlsx/.zip) para `year`.
+
+    `write(fn)` ejecuta fn(conn) en una transacción (db.write); se usa una por curso.
+    Retorna una fila por curso con conteos, estado, errores y tiempos."""
+    tmp = tempfile.mkdtemp(prefix="import_cursos_")
+    try:
+        tasks = plan(src, tmp)
+        if workers is None:
+            # Pocos cursos no justifican levantar procesos
+            workers = 1 if len(tasks) < 4 else min(len(tasks), os.cpu_count() or 1)
+        results = []
+        for p in _parsed(tasks, workers):
+            row = {"curso":p["curso"], "fuente":p["fuente"], "estado":"error",
+                   "estudiantes":len(p["students"]), "nuevos":0, "descartados":p["rejected"],
+                   "asignaturas":len(p["subjects"]), "lectura_s":p["parse_s"], "escritura_s":0.0,
+                   "detalle":" ".join(p["errors"] + p["warnings"])}
+            if not p["errors"]:
+                t0 = time.perf_counter()
+                try:
+                    r = write(lambda conn: import_records(conn, p["curso"], int(year), p["students"],
+                                                          p["subjects"]), exclusive=True)
+                    row.update(estado="ok", nuevos=r["created_students"])
+                except Exception as e:
+                    row["detalle"] = f"No se pudo escribir: {e}"
+                row["escritura_s"] = round(time.perf_counter() - t0, 4)
+            results.append(row)
+            if progress:
+                progress(len(results), len(tasks))
+        return results
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Importa varios cursos desde un libro o un ZIP de planillas.")
+    ap.add_argument("file")
+    ap.add_argument("--year", type=int, required=True)
+    ap.add_argument("--workers", type=int)
+    args = ap.parse_args()
+
+    import pandas as pd
+    from db import init_db, write
+    init_db()
+    t0 = time.perf_counter()
+    results = import_many(write, args.file, args.year, workers=args.workers)
+    with pd.option_context("display.width", 200, "display.max_colwidth", 60):
+        print(pd.DataFrame(results, columns=RESULT_COLS).to_string(index=False))
+    bad = sum(r["estado"] != "ok" for r in results)
+    print(f"{len(results) - bad} cursos importados, {bad} con errores en "
+          f"{time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    sys.exit(1 if bad else 0)
@@ -0,0 +1,212 @@
+# === Benchmarks de las rutas de la app sobre datos sintéticos ===
+# Mide las mismas consultas y funciones que usan las páginas (importación,
+# carga de notas, informes, listados) contra una base generada con datagen.py.
+# El caché de consultas se vacía antes de cada repetición: se mide el camino frío.
+#
+# Uso:  python benchmarks.py --db /tmp/bench.db --students 20000 --years 3 --save bench.json
+#       python benchmarks.py --db /tmp/bench.db --baseline bench.json   (falla si hay regresión)
+#       python benchmarks.py --db /tmp/bench.db --startup   -> arranque en frío de app.py:
+#           primera vista y primera carga de cada página, cada una en un proceso nuevo
+import argparse, io, json, os, platform, sqlite3, statistics, subprocess, sys, tempfile, time
+
+def _timeit(fn, repeat):
+    from db import query_cache
+    times = []
+    for _ in range(repeat):
+        query_cache.clear()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {"median_s":round(statistics.median(times), 6), "min_s":round(min(times), 6), "runs":repeat}
+
+def _course_workbook(n_students=45, tag="bench"):
+    import pandas as pd
+    from datagen import SUBJECTS
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        pd.DataFrame({
+            "run":[f"9{i:07d}-{tag}" for i in range(n_students)],
+            "first_name":[f"Nombre{i}" for i in range(n_students)],
+            "last_name":["Benchmark"] * n_students,
+            "email":[f"bench{i}.{tag}@example.cl" for i in range(n_students)],
+        }).to_excel(writer, index=False, sheet_name="estudiantes")
+        pd.DataFrame({"code":[c for c, _ in SUBJECTS], "name":[n for _, n in SUBJECTS]}
+                     ).to_excel(writer, index=False, sheet_name="asignaturas")
+    return buf.getvalue()
+
+def cases():
+    """(nombre, función) de cada ruta medida, con parámetros tomados de la base."""
+    import ui_catalog, ui_grades, ui_reports
+    from analytics import load_year, summarize
+    from db import YEARS_SQL, archived_years, engine, q, read_conn
+    from gradebook import GRADEBOOK_SQL, Gradebook
+    from importer import import_course, read_workbook
+    from paging import fetch_page, fts_query
+    from reports import course_frame, student_report
+
+    scale = (1.0, 60, 7.0)
+    yr = int(q("SELECT MAX(year) AS y FROM enrollments")["y"].iloc[0])
+    sub = int(q("SELECT MIN(id) AS s FROM subjects")["s"].iloc[0])
+    aid = int(q("SELECT MIN(id) AS a FROM assessments WHERE subject_id=:s AND date LIKE :y",
+                {"s":sub, "y":f"{yr}%"})["a"].iloc[0])
+    sid = int(q("SELECT MIN(student_id) AS s FROM enrollments WHERE year=:y", {"y":yr})["s"].iloc[0])
+    cid = int(q("SELECT MIN(id) AS c FROM courses WHERE year=:y", {"y":yr})["c"].iloc[0])
+    mid_student = int(q("SELECT (MIN(id)+MAX(id))/2 AS m FROM students")["m"].iloc[0])
+    mid_enr = int(q("SELECT (MIN(id)+MAX(id))/2 AS m FROM enrollments WHERE year=:y", {"y":yr})["m"].iloc[0])
+    workbook = _course_workbook()
+
+    def import_course_xlsx():
+        # Cuerpo de ui_import; la transacción se revierte para no alterar la base
+        df_students, df_subjects = read_workbook(io.BytesIO(workbook))
+        with engine.connect() as conn:
+            tx = conn.begin()
+            import_course(conn, "Curso benchmark", yr, df_students, df_subjects)
+            tx.rollback()
+
+    def year_analytics():
+        # Camino frío de la página Analítica, sin su caché
+        with engine.connect() as conn:
+            summarize(load_year(conn, yr), scale)
+
+    def load_year_archived(year):
+        with read_conn(year) as conn:
+            return load_year(conn, year)
+
+    def course_report():
+        with engine.connect() as conn:
+            course_frame(conn, yr, [cid], scale)
+
+    out = [
+        ("importar: planilla 45×12", import_course_xlsx),
+        ("notas: años", lambda: q(YEARS_SQL)),
+        ("notas: carga en bloque", lambda: ui_grades.load_scores(sub, yr, aid)),
+        # Camino frío del libro: consulta + armado de la matriz, sin su caché
+        ("notas: libro", lambda: Gradebook.from_rows(q(GRADEBOOK_SQL, {"s":sub, "y":yr}, columnar=True,
+                                                        categories=("estudiante", "title"))).frame(scale)),
+        ("informes: estudiante", lambda: student_report(sid, yr, scale)),
+        ("informes: estudiantes del año", lambda: q(ui_reports.STUDENTS_SQL, {"y":yr})),
+        ("informes: curso completo", course_report),
+        ("analítica: año completo", year_analytics),
+        ("listado: estudiantes p1", lambda: fetch_page(ui_catalog.STUDENTS_SQL, ["id"])),
+        ("listado: estudiantes medio", lambda: fetch_page(ui_catalog.STUDENTS_SQL, ["id"], cursor=(mid_student,))),
+        ("listado: búsqueda", lambda: fetch_page(ui_catalog.STUDENTS_SEARCH_SQL, ["id"], {"m":fts_query("ana gonz")})),
+        ("listado: matrículas p1", lambda: fetch_page(ui_catalog.ENROLLMENTS_SQL, ui_catalog.ENROLLMENT_KEYS)),
+        ("listado: matrículas medio", lambda: fetch_page(ui_catalog.ENROLLMENTS_SQL, ui_catalog.ENROLLMENT_KEYS,
+                                                         cursor=(yr, mid_enr))),
+        ("listado: evaluaciones p1", lambda: fetch_page(ui_catalog.ASSESSMENTS_SQL, ui_catalog.ASSESSMENT_KEYS)),
+    ]
+    archived = sorted(archived_years())
+    if archived:
+        # Un año cerrado: cada consulta adjunta su archivo (ver archive.py)
+        ay = archived[-1]
+        a_aid = int(q("SELECT MIN(id) AS a FROM assessments WHERE subject_id=:s", {"s":sub}, year=ay)["a"].iloc[0])
+        out += [
+            ("archivo: carga en bloque", lambda: ui_grades.load_scores(sub, ay, a_aid)),
+            ("archivo: informes estudiante", lambda: student_report(sid, ay, scale)),
+            ("archivo: analítica año completo", lambda: summarize(load_year_archived(ay), scale)),
+        ]
+    return out
+
+def run(repeat=5):
+    from db import q
+    counts = {t: int(q(f"SELECT COUNT(*) AS n FROM {t}")["n"].iloc[0])
+              for t in ("students","enrollments","assessments","grades")}
+    results = {name: _timeit(fn, repeat) for name, fn in cases()}
+    return {"meta":{"python":platform.python_version(), "sqlite":sqlite3.sqlite_version,
+                    "machine":platform.machine(), "rows":counts,
+                    "date":time.strftime("%Y-%m-%dT%H:%M:%S")},
+            "results":results}
+
+def compare(current, baseline, tolerance=0.25, floor_s=0.002):
+    """Casos cuya mediana empeoró más de `tolerance` (y más de `floor_s` absolutos)."""
+    bad = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        limit = max(base["median_s"] * (1 + tolerance), base["median_s"] + floor_s)
+        if cur["median_s"] > limit:
+            bad.append((name, base["median_s"], cur["median_s"]))
+    return bad
+
+# --- Arranque en frío de la app ---
+# Cada medición corre en un proceso nuevo con AppTest (el mismo motor de Streamlit
+# sin navegador): lo que cuenta es cuánto importa y arma cada página la primera vez.
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "openpyxl")
+
+def _startup_measure(page):
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    t1 = time.perf_counter()
+    at = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"),
+                           default_timeout=120)
+    at.run()
+    t2 = time.perf_counter()
+    out = {"página":page or "(inicio)", "streamlit_s":round(t1 - t0, 3), "primera_vista_s":round(t2 - t1, 3)}
+    if page:
+        at.sidebar.radio[0].set_value(page).run()
+        t3 = time.perf_counter()
+        at.run()
+        out.update(primera_carga_s=round(t3 - t2, 3), rerun_s=round(time.perf_counter() - t3, 3))
+    out.update({m: m in sys.modules for m in HEAVY_MODULES})
+    out["error"] = at.exception[0].message if at.exception else None
+    out["páginas"] = list(at.sidebar.radio[0].options)
+    return out
+
+def startup():
+    """Primera vista de la app y primera carga de cada página, cada una en un proceso nuevo."""
+    def measure(page):
+        r = subprocess.run([sys.executable, os.path.abspath(__file__), "_startup", page],
+                           env=dict(os.environ), check=True, capture_output=True, text=True)
+        return json.loads(r.stdout.strip().splitlines()[-1])
+    first = measure("")
+    return [first] + [measure(page) for page in first["páginas"]]
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["_startup"]:
+        print(json.dumps(_startup_measure(sys.argv[2]), ensure_ascii=False))
+        sys.exit(0)
+    ap = argparse.ArgumentParser(description="Benchmarks de la app sobre datos sintéticos.")
+    ap.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "school_bench.db"))
+    ap.add_argument("--students", type=int, default=5000, help="Escala si hay que generar la base.")
+    ap.add_argument("--years", type=int, default=2)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--save", help="Guardar resultados en este JSON.")
+    ap.add_argument("--baseline", help="JSON previo; sale con código 1 si hay regresiones.")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--startup", action="store_true", help="Medir el arranque en frío de app.py.")
+    args = ap.parse_args()
+
+    # La base se elige antes de importar db (ver SCHOOL_DB en db.py)
+    os.environ["SCHOOL_DB"] = args.db
+    fresh = not os.path.exists(args.db)
+    from db import init_db, transaction
+    init_db()
+    if fresh:
+        from datagen import generate
+        with transaction() as conn:
+            generate(conn, students=args.students, years=args.years)
+
+    if args.startup:
+        rows = startup()
+        print(f"{'página':<14} {'streamlit':>9} {'1ª vista':>9} {'1ª carga':>9} {'rerun':>7}  cargados")
+        for r in rows:
+            loaded = ", ".join(m for m in HEAVY_MODULES if r[m]) or "-"
+            print(f"{r['página']:<14} {r['streamlit_s']:9.3f} {r['primera_vista_s']:9.3f} "
+                  f"{r.get('primera_carga_s', 0):9.3f} {r.get('rerun_s', 0):7.3f}  {loaded}"
+                  + (f"  ERROR: {r['error']}" if r["error"] else ""))
+        sys.exit(0)
+
+    current = run(args.repeat)
+    width = max(len(n) for n in current["results"])
+    for name, r in current["results"].items():
+        print(f"{name:<{width}}  {r['median_s'] * 1000:9.2f} ms  (min {r['min_s'] * 1000:.2f})")
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            bad = compare(current, json.load(f), args.tolerance)
+        for name, before, after in bad:
+            print(f"REGRESIÓN {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms")
+        sys.exit(1 if bad else 0)
@@ -0,0 +1,148 @@
+# === Caché de resultados de q() invalidada por escrituras ===
+# Cada tabla tiene un contador de generación. Una entrada guarda la generación
+# de las tablas que leyó; cuando una escritura confirmada toca alguna de ellas
+# (db.py sube el contador al hacer COMMIT), la entrada deja de ser válida.
+# El caché es compartido por todas las sesiones del proceso.
+# Además, un escritor puede declarar el ámbito de su escritura (p.ej. las notas
+# de una asignatura); scoped_generation permite invalidar por ámbito a quien
+# guarde resultados más finos que una tabla (ver gradebook.py).
+import re, threading
+from collections import OrderedDict
+
+_READ_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w.]*)", re.I)
+_WRITE_RE = re.compile(
+    r"\b(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)"
+    r"\s+([A-Za-z_][\w.]*)", re.I)
+
+def normalize(sql):
+    return " ".join(sql.split())
+
+def _names(regex, sql):
+    return frozenset(m.split(".")[-1].lower() for m in regex.findall(sql))
+
+def tables_read(sql):
+    return _names(_READ_RE, sql)
+
+def tables_written(sql):
+    return _names(_WRITE_RE, sql)
+
+def is_cacheable(sql):
+    head = sql.lstrip()[:6].upper()
+    return head in ("SELECT", "WITH") and not tables_written(sql)
+
+class QueryCache:
+    """LRU acotado de DataFrames, con invalidación por tabla."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._gen = {}
+        # Tablas derivadas (p.ej. mantenidas por triggers) que cambian con otra
+        self._dependents = {}
+        # Escrituras con ámbito declarado y escrituras sin ámbito, por tabla
+        self._scoped = {}
+        self._unscoped = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def key(sql, params):
+        items = tuple(sorted((params or {}).items()))
+        return normalize(sql), items
+
+    def generation(self, tables):
+        with self._lock:
+            return tuple(self._gen.get(t, 0) for t in sorted(tables))
+
+    def get(self, key, tables):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                gen, df = entry
+                if gen == tuple(self._gen.get(t, 0) for t in sorted(tables)):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return df.copy()
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, gen, df):
+        # `gen` se toma ANTES de ejecutar la consulta: si una escritura ocurre
+        # mientras tanto, la entrada nace vencida en vez de guardar datos viejos.
+        with self._lock:
+            self._data[key] = (gen, df.copy())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def add_dependents(self, table, *derived):
+        with self._lock:
+            self._dependents.setdefault(table, set()).update(derived)
+
+    def scoped_generation(self, table, scope):
+        """Cambia si se escribió `table` en el ámbito `scope` o sin declarar ámbito."""
+        with self._lock:
+            return self._unscoped.get(table, 0), self._scoped.get((table, scope), 0)
+
+    def bump(self, tables, scopes=()):
+        with self._lock:
+            for key in scopes:
+                self._scoped[key] = self._scoped.get(key, 0) + 1
+            scoped_tables = {t for t, _ in scopes}
+            for t in tables:
+                if t not in scoped_tables:
+                    self._unscoped[t] = self._unscoped.get(t, 0) + 1
+            pending = list(tables)
+            seen = set()
+            while pending:
+                t = pending.pop()
+                if t in seen:
+                    continue
+                seen.add(t)
+                self._gen[t] = self._gen.get(t, 0) + 1
+                if t not in tables:
+                    # Una tabla derivada (trigger, cascada) cambia sin ámbito declarado
+                    self._unscoped[t] = self._unscoped.get(t, 0) + 1
+                pending.extend(self._dependents.get(t, ()))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits":self.hits, "misses":self.misses, "evictions":self.evictions,
+                    "entries":len(self._data),
+                    "hit_rate":round(self.hits / total, 3) if total else 0.0}
+
+class Memo:
+    """LRU de objetos ya calculados (p.ej. matrices), válidos mientras su generación no cambie.
+
+    A diferencia de QueryCache no copia: los objetos guardados se tratan como inmutables."""
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, gen, build):
+        # `gen` se toma antes de calcular, como en QueryCache.put
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] == gen:
+                self._data.move_to_end(key)
+                return entry[1]
+        value = build()
+        with self._lock:
+            self._data[key] = (gen, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,205 @@
+# === Registro de cambios (change_log) y exportación incremental ===
+# Los triggers de la migración 5 (migrations.py) agregan una fila a change_log
+# por cada INSERT/UPDATE/DELETE en students, enrollments, assessments y grades
+# (TRACKED; registrar otra tabla requiere una migración nueva con sus triggers):
+# sólo (seq, tabla, operación, id, hora), sin copiar la fila. `seq` es la marca
+# de agua: crece en orden de COMMIT (SQLite tiene un único escritor) y
+# AUTOINCREMENT no la reutiliza aunque se poden filas antiguas.
+#
+# La exportación lee, en una sola instantánea de lectura, los cambios con
+# desde < seq <= hasta y entrega el cambio neto de cada fila: su estado actual
+# (op I o U) o su eliminación (op D, sólo el id). La carga inicial (--full)
+# exporta el estado completo de cada tabla con la marca del momento. Se escribe
+# un archivo por tabla, por bloques. Las filas que salieron de la base principal
+# al archivar su año (archive.py) no se exportan como eliminaciones si su último
+# cambio es anterior al cierre: se omiten.
+#
+# Uso:  python changes.py export --full --format csv|parquet|jsonl --out carpeta
+#       python changes.py export --since 1200 --format csv --out carpeta
+#       python changes.py export --state sync.json --format parquet --out carpeta
+#           -> lee la marca de sync.json y la actualiza al terminar
+#       python changes.py prune --upto 1200   -> borra del registro lo ya sincronizado
+#       python changes.py status              -> marca actual y cambios por tabla
+import argparse, json, os, sqlite3, sys
+from sqlalchemy import text
+
+TRACKED = ("students", "enrollments", "assessments", "grades")
+FORMATS = {"csv":".csv", "parquet":".parquet", "jsonl":".jsonl"}
+
+def watermark(conn):
+    return conn.execute(text("SELECT COALESCE(MAX(seq), 0) FROM change_log")).scalar()
+
+def _columns(conn, table):
+    """(nombre, tipo declarado) de las columnas de `table`, sin el id."""
+    return [(r[1], (r[2] or "").upper()) for r in conn.execute(text(f"PRAGMA table_info({table})"))
+            if r[1] != "id"]
+
+def _changes_sql(table, cols, full):
+    select = ", ".join(f"t.{c}" for c, _ in cols)
+    if full:
+        return f"""SELECT :hasta AS seq, 'I' AS op, NULL AS changed_at, t.id, {select}
+                   FROM {table} t ORDER BY t.id"""
+    # Último cambio de cada fila en el rango; si la fila ya no existe, es una
+    # eliminación, salvo que esté en el archivo de un año cerrado (:archivados)
+    return f"""SELECT c.seq, CASE WHEN t.id IS NULL THEN 'D' ELSE c.op END AS op,
+                      c.changed_at, c.row_id AS id, {select}
+               FROM (SELECT MAX(seq) AS seq FROM change_log
+                     WHERE seq > :desde AND seq <= :hasta AND tbl = :t GROUP BY row_id) last
+               JOIN change_log c ON c.seq = last.seq
+               LEFT JOIN {table} t ON t.id = c.row_id
+               WHERE t.id IS NOT NULL OR c.row_id NOT IN (SELECT value FROM json_each(:archivados))
+               ORDER BY c.seq"""
+
+def _archived_ids(conn, table, since, until):
+    """Ids de `table` con cambios en el rango que ya no están en la base principal
+    porque su año se archivó (archive.py): no se borraron, se movieron de archivo.
+
+    Sólo cuentan si su último cambio es anterior al cierre (archived_years.log_seq):
+    una evaluación compartida con otro año se copia al archivo pero sigue en la
+    principal, y si después se borra, ese borrado sí se exporta."""
+    from db import ARCHIVED_TABLES, DB_PATH
+    if table not in ARCHIVED_TABLES:
+        return []
+    missing = conn.execute(text(f"""
+        SELECT c.row_id, MAX(c.seq) FROM change_log c LEFT JOIN {table} t ON t.id = c.row_id
+        WHERE c.seq > :desde AND c.seq <= :hasta AND c.tbl = :t AND t.id IS NULL
+        GROUP BY c.row_id"""), {"desde":since, "hasta":until, "t":table}).fetchall()
+    if not missing:
+        return []
+    found = []
+    folder = os.path.dirname(DB_PATH)
+    for path, log_seq in conn.execute(text("SELECT path, log_seq FROM archived_years")).fetchall():
+        ids = [row_id for row_id, seq in missing if seq <= log_seq]
+        if not ids:
+            continue
+        # Un archivo no cambia después del cierre: se lee aparte, sin ATTACH (que
+        # no se permite dentro de la transacción de la exportación)
+        arch = sqlite3.connect(f"file:{os.path.join(folder, path)}?mode=ro", uri=True)
+        try:
+            found += [r[0] for r in arch.execute(
+                f"SELECT id FROM {table} WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),))]
+        finally:
+            arch.close()
+    return found
+
+def _arrow_schema(cols):
+    import pyarrow as pa
+    kind = lambda decl: (pa.int64() if "INT" in decl else
+                         pa.float64() if any(k in decl for k in ("REAL", "FLOA", "DOUB")) else pa.string())
+    return pa.schema([("seq", pa.int64()), ("op", pa.string()), ("changed_at", pa.string()),
+                      ("id", pa.int64())] + [(c, kind(decl)) for c, decl in cols])
+
+class _Sink:
+    """Escribe bloques (DataFrames) de una tabla en un archivo del formato pedido."""
+
+    def __init__(self, path, fmt, cols):
+        self.path, self.fmt, self.rows = path, fmt, 0
+        # Enteros con nulos (filas eliminadas) quedarían como reales: 63589.0
+        self.ints = ["seq", "id"] + [c for c, decl in cols if "INT" in decl]
+        self._pq = None
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self.schema = _arrow_schema(cols)
+            self._pq = pq.ParquetWriter(path, self.schema)
+        else:
+            self._f = open(path, "w", encoding="utf-8", newline="")
+
+    def write(self, df):
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            # Esquema fijo: un bloque sin valores en una columna no cambia su tipo
+            self._pq.write_table(pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+        else:
+            out = df.astype({c: "Int64" for c in self.ints if df[c].dtype != "int64"})
+            if self.fmt == "csv":
+                out.to_csv(self._f, header=self.rows == 0, index=False)
+            else:
+                out.to_json(self._f, orient="records", lines=True, force_ascii=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self._pq is not None:
+            self._pq.close()
+        else:
+            self._f.close()
+
+def export(conn, since, out_dir, fmt="csv", chunk_rows=50_000, tables=TRACKED):
+    """Exporta los cambios con seq > `since` a un archivo por tabla en `out_dir`.
+
+    `since=None` exporta el estado completo (carga inicial).
+
+    Retorna {"desde", "hasta", "filas": {tabla: n}}; `hasta` es la marca para la
+    próxima exportación. `conn` debe ser una conexión sin transacción abierta."""
+    from columnar import iter_frames
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt}")
+    os.makedirs(out_dir, exist_ok=True)
+    full = since is None
+    since = 0 if full else int(since)
+    # Una sola instantánea: las tablas y el registro se leen en el mismo punto
+    conn.exec_driver_sql("BEGIN")
+    try:
+        until = watermark(conn)
+        rows = {}
+        for table in tables:
+            cols = _columns(conn, table)
+            name = f"{table}_completo_{until}" if full else f"{table}_{since}_{until}"
+            sink = _Sink(os.path.join(out_dir, name + FORMATS[fmt]), fmt, cols)
+            try:
+                archived = [] if full else _archived_ids(conn, table, since, until)
+                res = conn.execute(text(_changes_sql(table, cols, full)),
+                                   {"desde":since, "hasta":until, "t":table, "archivados":json.dumps(archived)})
+                for df in iter_frames(res, chunk_rows):
+                    sink.write(df)
+            finally:
+                sink.close()
+            rows[table] = sink.rows
+    finally:
+        conn.rollback()
+    return {"desde":since, "hasta":until, "filas":rows}
+
+def prune(conn, upto):
+    """Borra del registro los cambios con seq <= `upto` (ya sincronizados). Retorna cuántos."""
+    return conn.execute(text("DELETE FROM change_log WHERE seq <= :s"), {"s":int(upto)}).rowcount
+
+def status(conn):
+    counts = dict(conn.execute(text("SELECT tbl, COUNT(*) FROM change_log GROUP BY tbl")).fetchall())
+    return {"marca":watermark(conn), "pendientes":{t: counts.get(t, 0) for t in TRACKED}}
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Registro de cambios y exportación incremental.")
+    ap.add_argument("cmd", choices=["export", "prune", "status"])
+    ap.add_argument("--since", type=int, help="Marca de la última exportación.")
+    ap.add_argument("--full", action="store_true", help="Estado completo (carga inicial).")
+    ap.add_argument("--state", help="JSON con la marca; se lee al empezar y se actualiza al terminar.")
+    ap.add_argument("--format", choices=list(FORMATS), default="csv")
+    ap.add_argument("--out", default="cambios")
+    ap.add_argument("--chunk-rows", type=int, default=50_000)
+    ap.add_argument("--upto", type=int, help="prune: borrar hasta esta marca (incluida).")
+    args = ap.parse_args()
+
+    from db import init_db, read_engine, transaction
+    init_db()
+    if args.cmd == "status":
+        with read_engine.connect() as conn:
+            print(status(conn))
+    elif args.cmd == "prune":
+        if args.upto is None:
+            ap.error("prune requiere --upto")
+        with transaction() as conn:
+            print(f"{prune(conn, args.upto)} cambios borrados del registro.")
+    else:
+        since = args.since
+        if since is None and args.state and os.path.exists(args.state):
+            with open(args.state, encoding="utf-8") as f:
+                since = json.load(f)["marca"]
+        if since is None and not args.full:
+            ap.error("export requiere --full, --since o un --state existente")
+        with read_engine.connect() as conn:
+            result = export(conn, None if args.full else since, args.out, args.format, args.chunk_rows)
+        if args.state:
+            with open(args.state, "w", encoding="utf-8") as f:
+                json.dump({"marca":result["hasta"]}, f)
+        for table, n in result["filas"].items():
+            print(f"{table}: {n} filas")
+        print(f"marca {'completo' if args.full else result['desde']} -> {result['hasta']}", file=sys.stderr)
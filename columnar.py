@@ -0,0 +1,181 @@
+# === Resultados por columnas (q(columnar=True) y q_chunks) ===
+# q() arma el DataFrame con res.fetchall(): la lista de filas y el DataFrame
+# conviven en memoria, y cada texto es un objeto Python por celda. Aquí el
+# cursor se lee por lotes y cada lote pasa de inmediato a columnas tipadas:
+# enteros y reales a NumPy, textos a arreglos Arrow (un búfer contiguo, como el
+# dtype `str` de pandas) y las columnas pedidas como categóricas (nombres que se
+# repiten: asignatura, curso, título) quedan codificadas como diccionario.
+# Sólo un lote de filas vive a la vez.
+#
+# Uso:  python columnar.py bench --db /tmp/bench.db [--students 20000] [--years 2]
+#       -> memoria (pico y retenida) y tiempo de q() por filas vs. por columnas,
+#          cada caso en un proceso nuevo
+import argparse, json, os, subprocess, sys, tempfile, time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+BATCH_ROWS = 10_000
+
+def _chunk(values):
+    """(tipo, arreglo) de los valores de una columna en un lote."""
+    kinds = {type(v) for v in values}
+    has_null = type(None) in kinds
+    kinds.discard(type(None))
+    if not kinds:
+        return "null", len(values)
+    if kinds == {int} and not has_null:
+        return "int", np.array(values, dtype=np.int64)
+    if kinds <= {int, float}:
+        # Como pandas: un entero con nulos pasa a real (None -> NaN)
+        return "float", np.array(values, dtype=float)
+    if kinds == {str}:
+        return "str", pa.array(values, type=pa.string())
+    out = np.empty(len(values), dtype=object)
+    out[:] = values
+    return "object", out
+
+def _column(chunks, categorical=False):
+    """Une los lotes de una columna en un arreglo para el DataFrame."""
+    kinds = {k for k, _ in chunks} - {"null"}
+    size = lambda k, c: c if k == "null" else len(c)
+    if not kinds:
+        return np.full(sum(size(k, c) for k, c in chunks), None, dtype=object)
+    if kinds == {"int"}:
+        return np.concatenate([c for _, c in chunks])
+    if kinds <= {"int", "float"}:
+        return np.concatenate([np.full(c, np.nan) if k == "null" else c.astype(float, copy=False)
+                               for k, c in chunks])
+    if kinds == {"str"}:
+        arr = pa.chunked_array([pa.nulls(c, pa.string()) if k == "null" else c for k, c in chunks],
+                               type=pa.string())
+        if categorical:
+            arr = arr.combine_chunks().dictionary_encode()
+        return arr.to_pandas()
+    # Tipos mezclados en la columna (SQLite lo permite): objetos, como pandas
+    parts = []
+    for k, c in chunks:
+        if k == "null":
+            parts.append(np.full(c, None, dtype=object))
+        elif k == "str":
+            parts.append(np.array(c.to_pylist(), dtype=object))
+        else:
+            parts.append(c.astype(object))
+    return np.concatenate(parts)
+
+def _frame(columns, chunks, categories):
+    if not any(chunks):
+        return pd.DataFrame(columns=columns)
+    data = {i: _column(c, columns[i] in categories) for i, c in enumerate(chunks)}
+    df = pd.DataFrame({i: pd.Series(v) for i, v in data.items()}, copy=False)
+    df.columns = columns
+    return df
+
+def _read(res, n, ncols):
+    rows = res.fetchmany(n)
+    if not rows:
+        return None
+    return [_chunk(values) for values in zip(*rows)] if ncols else []
+
+def frame_from_result(res, categories=(), batch_rows=BATCH_ROWS):
+    """DataFrame del resultado `res` leído por lotes a columnas tipadas.
+
+    `categories` son los nombres de columnas de texto que quedan como categóricas."""
+    columns = list(res.keys())
+    chunks = [[] for _ in columns]
+    while (batch := _read(res, batch_rows, len(columns))) is not None:
+        for col, chunk in zip(chunks, batch):
+            col.append(chunk)
+    return _frame(columns, chunks, set(categories))
+
+def iter_frames(res, chunk_rows=50_000, categories=()):
+    """DataFrames sucesivos de a lo más `chunk_rows` filas (para exportar sin cargar todo)."""
+    columns = list(res.keys())
+    categories = set(categories)
+    while (batch := _read(res, chunk_rows, len(columns))) is not None:
+        yield _frame(columns, [[c] for c in batch], categories)
+
+# --- Benchmark de memoria (línea de comandos) ---
+BENCH_QUERIES = {
+    "matrículas del año": ("""
+        SELECT e.id, (st.first_name||' '||st.last_name) AS estudiante, su.name AS asignatura,
+               c.name AS curso, e.year
+        FROM enrollments e
+        JOIN students st ON st.id=e.student_id
+        JOIN subjects su ON su.id=e.subject_id
+        LEFT JOIN student_courses sc ON sc.student_id=e.student_id
+        LEFT JOIN courses c ON c.id=sc.course_id AND c.year=e.year
+        WHERE e.year=:y""", ("asignatura", "curso")),
+    "notas del año": ("""
+        SELECT g.enrollment_id, st.first_name||' '||st.last_name AS estudiante,
+               su.name AS asignatura, a.title, a.date, g.score
+        FROM grades g
+        JOIN enrollments e ON e.id=g.enrollment_id
+        JOIN students st ON st.id=e.student_id
+        JOIN subjects su ON su.id=e.subject_id
+        JOIN assessments a ON a.id=g.assessment_id
+        WHERE e.year=:y""", ("estudiante", "asignatura", "title", "date")),
+}
+
+def _rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+def _measure(name, mode, year):
+    # Corre en un proceso nuevo: el pico de RSS (VmHWM) es sólo de esta consulta
+    import resource
+    from db import q
+    sql, cats = BENCH_QUERIES[name]
+    q("SELECT 1 AS x", cached=False)
+    base = _rss_kb()
+    t0 = time.perf_counter()
+    if mode == "filas":
+        df = q(sql, {"y":year}, cached=False)
+    elif mode == "columnas":
+        df = q(sql, {"y":year}, cached=False, columnar=True, categories=cats)
+    else:
+        from db import q_chunks
+        rows = 0
+        for part in q_chunks(sql, {"y":year}, categories=cats):
+            rows += len(part)
+        df = part
+    secs = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"consulta":name, "modo":mode, "filas":rows if mode == "bloques" else len(df),
+            "segundos":round(secs, 3), "pico_mb":round((peak - base) / 1024, 1),
+            "retenida_mb":round(df.memory_usage(deep=True).sum() / 2**20, 1)}
+
+def bench(db_path, students=20000, years=2):
+    """Mide cada consulta de BENCH_QUERIES en cada modo, en procesos separados."""
+    env = dict(os.environ, SCHOOL_DB=db_path)
+    if not os.path.exists(db_path):
+        subprocess.run([sys.executable, "-c",
+                        "from db import init_db, transaction; from datagen import generate; init_db()\n"
+                        f"with transaction() as conn: generate(conn, students={students}, years={years})"],
+                       env=env, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    out = []
+    for name in BENCH_QUERIES:
+        for mode in ("filas", "columnas", "bloques"):
+            r = subprocess.run([sys.executable, os.path.abspath(__file__), "_measure", name, mode],
+                               env=env, check=True, capture_output=True, text=True)
+            out.append(json.loads(r.stdout.strip().splitlines()[-1]))
+    return out
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["_measure"]:
+        from db import q
+        year = int(q("SELECT MAX(year) AS y FROM enrollments")["y"].iloc[0])
+        print(json.dumps(_measure(sys.argv[2], sys.argv[3], year), ensure_ascii=False))
+        sys.exit(0)
+    ap = argparse.ArgumentParser(description="Resultados de q() por columnas: benchmark de memoria.")
+    ap.add_argument("cmd", choices=["bench"])
+    ap.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "school_bench.db"))
+    ap.add_argument("--students", type=int, default=20000, help="Escala si hay que generar la base.")
+    ap.add_argument("--years", type=int, default=2)
+    args = ap.parse_args()
+    rows = bench(args.db, args.students, args.years)
+    with pd.option_context("display.width", 200):
+        print(pd.DataFrame(rows).to_string(index=False))
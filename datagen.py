@@ -0,0 +1,131 @@
+# === Generador determinista de datos escolares sintéticos ===
+# Llena el esquema de la app (cursos, asignaturas, estudiantes, matrículas,
+# evaluaciones y notas) a la escala pedida. Misma semilla => mismos datos.
+# Cada año todos los estudiantes se reparten en cursos de `course_size` y se
+# matriculan en todas las asignaturas; cada asignatura tiene `assessments`
+# evaluaciones por año. Notas = students × years × subjects × assessments.
+#
+# Uso:  SCHOOL_DB=/tmp/bench.db python datagen.py --students 50000 --years 5
+import argparse, sys, time
+import numpy as np
+from sqlalchemy import text
+
+FIRST = ["Ana","Luis","María","José","Camila","Diego","Valentina","Matías","Sofía","Benjamín",
+         "Isidora","Tomás","Antonia","Vicente","Florencia","Martín","Catalina","Joaquín","Javiera","Lucas"]
+LAST = ["González","Muñoz","Rojas","Díaz","Pérez","Soto","Contreras","Silva","Martínez","Sepúlveda",
+        "Morales","Rodríguez","López","Fuentes","Hernández","Torres","Araya","Flores","Espinoza","Valenzuela"]
+SUBJECTS = [("MAT","Matemática"),("LEN","Lenguaje"),("HIS","Historia"),("CIE","Ciencias Naturales"),
+            ("ING","Inglés"),("EDF","Educación Física"),("ART","Artes Visuales"),("MUS","Música"),
+            ("TEC","Tecnología"),("REL","Religión"),("ORI","Orientación"),("FIL","Filosofía")]
+
+def _rut_dv(n):
+    s, m = 0, 2
+    while n:
+        s += (n % 10) * m
+        n //= 10
+        m = 2 if m == 7 else m + 1
+    r = 11 - s % 11
+    return "0" if r == 11 else "K" if r == 10 else str(r)
+
+def _chunks(rows, size=50_000):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+def _next_id(conn, table):
+    # AUTOINCREMENT: el próximo id sale de sqlite_sequence, no de MAX(id)
+    seq = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name=:t"), {"t":table}).scalar()
+    return int(seq or 0) + 1
+
+def generate(conn, students=2000, years=1, start_year=2021, subjects=12, assessments=4,
+             course_size=45, seed=42):
+    """Inserta un colegio sintético en `conn` (esquema ya creado). Retorna conteos."""
+    rng = np.random.default_rng(seed)
+    subjects = min(subjects, len(SUBJECTS))
+    counts = {}
+    ins = conn.exec_driver_sql
+
+    # Asignaturas
+    subj_rows = SUBJECTS[:subjects]
+    ins("INSERT OR IGNORE INTO subjects(code,name) VALUES(?,?)", subj_rows)
+    subj_ids = [r[0] for r in conn.execute(text(
+        "SELECT id FROM subjects WHERE code IN ({}) ORDER BY id".format(",".join(f"'{c}'" for c, _ in subj_rows))))]
+
+    # Estudiantes
+    base = _next_id(conn, "students") - 1
+    fi = rng.integers(0, len(FIRST), students)
+    li = rng.integers(0, len(LAST), students)
+    runs = 10_000_000 + base + np.arange(students)
+    created = "2020-01-01T00:00:00"
+    rows = [(f"{r}-{_rut_dv(int(r))}", FIRST[a], LAST[b],
+             f"{FIRST[a].lower()}.{LAST[b].lower()}{r}@example.cl", created)
+            for r, a, b in zip(runs.tolist(), fi.tolist(), li.tolist())]
+    for chunk in _chunks(rows):
+        ins("INSERT INTO students(run,first_name,last_name,email,created_at) VALUES(?,?,?,?,?)", chunk)
+    student_ids = np.arange(base + 1, base + students + 1)
+    counts["students"] = students
+    ability = rng.normal(65, 15, students)
+
+    n_courses = max(1, -(-students // course_size))
+    counts.update(courses=0, enrollments=0, assessments=0, grades=0)
+    for y in range(start_year, start_year + years):
+        # Cursos del año y su malla
+        names = [f"{1 + c // 26}°{chr(65 + c % 26)}" for c in range(n_courses)]
+        ins("INSERT OR IGNORE INTO courses(name, year) VALUES(?,?)", [(n, y) for n in names])
+        course_ids = [r[0] for r in conn.execute(text("SELECT id FROM courses WHERE year=:y ORDER BY id"), {"y":y})]
+        ins("INSERT OR IGNORE INTO course_subjects(course_id,subject_id) VALUES(?,?)",
+            [(c, s) for c in course_ids for s in subj_ids])
+        counts["courses"] += len(course_ids)
+
+        order = rng.permutation(students)
+        sc = [(int(student_ids[i]), course_ids[k // course_size]) for k, i in enumerate(order.tolist())]
+        for chunk in _chunks(sc):
+            ins("INSERT OR IGNORE INTO student_courses(student_id,course_id) VALUES(?,?)", chunk)
+
+        # Matrículas: todos en todas las asignaturas del año
+        first_enr = _next_id(conn, "enrollments")
+        enr = [(int(s), sub, y) for s in student_ids.tolist() for sub in subj_ids]
+        for chunk in _chunks(enr):
+            ins("INSERT INTO enrollments(student_id,subject_id,year) VALUES(?,?,?)", chunk)
+        counts["enrollments"] += len(enr)
+        # ids consecutivos: (estudiante i, asignatura j) -> first_enr + i*subjects + j
+        enr_ids = first_enr + np.arange(len(enr)).reshape(students, len(subj_ids))
+
+        # Evaluaciones por asignatura y año
+        first_a = _next_id(conn, "assessments")
+        weights = rng.choice([1.0, 1.0, 2.0, 3.0], (len(subj_ids), assessments))
+        arows = [(sub, f"Evaluación {k + 1}", f"{y}-{3 + (k * 9) // max(assessments, 1):02d}-15", 100.0,
+                  float(weights[j, k]))
+                 for j, sub in enumerate(subj_ids) for k in range(assessments)]
+        ins("INSERT INTO assessments(subject_id,title,date,max_score,weight) VALUES(?,?,?,?,?)", arows)
+        counts["assessments"] += len(arows)
+        a_ids = first_a + np.arange(len(arows)).reshape(len(subj_ids), assessments)
+
+        # Notas: habilidad del estudiante + ruido
+        scores = np.clip(np.round(ability[:, None, None] + rng.normal(0, 12, (students, len(subj_ids), assessments)), 1),
+                         0, 100)
+        e = np.repeat(enr_ids[:, :, None], assessments, axis=2).ravel().tolist()
+        a = np.broadcast_to(a_ids[None, :, :], scores.shape).ravel().tolist()
+        grows = list(zip(e, a, scores.ravel().tolist()))
+        for chunk in _chunks(grows):
+            ins("INSERT INTO grades(enrollment_id,assessment_id,score) VALUES(?,?,?)", chunk)
+        counts["grades"] += len(grows)
+    return counts
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Genera un colegio sintético en la base de datos (SCHOOL_DB).")
+    ap.add_argument("--students", type=int, default=2000)
+    ap.add_argument("--years", type=int, default=1)
+    ap.add_argument("--start-year", type=int, default=2021)
+    ap.add_argument("--subjects", type=int, default=12)
+    ap.add_argument("--assessments", type=int, default=4)
+    ap.add_argument("--course-size", type=int, default=45)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    from db import DB_PATH, init_db, transaction
+    init_db()
+    t0 = time.perf_counter()
+    with transaction() as conn:
+        counts = generate(conn, args.students, args.years, args.start_year, args.subjects,
+                          args.assessments, args.course_size, args.seed)
+    print(f"{DB_PATH}: {counts} en {time.perf_counter() - t0:.1f}s", file=sys.stderr)
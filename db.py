@@ -0,0 +1,347 @@
+# === Capa de base de datos ===
+# El motor se crea una sola vez por proceso: Streamlit re-ejecuta app.py en cada
+# interacción, pero los módulos importados (este) se conservan entre reruns.
+# Las lecturas de q() usan un pool de conexiones de sólo lectura (WAL permite
+# leer mientras se escribe); las escrituras de la app van por `write`, que las
+# entrega al hilo escritor único (writer.py). Los años cerrados viven en archivos
+# aparte (archive.py) y se adjuntan sólo al leer ese año (read_conn).
+# pandas y columnar.py se importan en la primera consulta, no al importar este
+# módulo: la página de inicio de la app arranca sin ellos.
+import os, tempfile, threading
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, text
+from changes import TRACKED as CHANGE_TRACKED
+from cache import QueryCache, is_cacheable, tables_read, tables_written
+from instrument import attach as attach_instrumentation, counting_for, note_rows, statement_counter
+from migrations import migrate
+from writer import WriteQueue
+
+# --- DB en carpeta escribible (válido en Streamlit Cloud) ---
+# SCHOOL_DB permite apuntar a otra base (p.ej. datos sintéticos de datagen.py)
+DB_PATH = os.environ.get("SCHOOL_DB") or os.path.join(tempfile.gettempdir(), "school.db")
+
+# PRAGMAs por conexión. WAL permite lectores concurrentes con un escritor.
+# foreign_keys activa los ON DELETE CASCADE declarados en el esquema, que antes
+# no se aplicaban: borrar un estudiante borra sus matrículas, notas y vínculos a
+# cursos; una asignatura, sus matrículas, evaluaciones y notas; un curso, sus
+# vínculos. Antes esas filas quedaban huérfanas.
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,            # ms de espera ante "database is locked"
+    "foreign_keys": "ON",
+    "cache_size": -32000,            # ~32 MB (negativo = KiB)
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+def _apply_pragmas(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    for name, value in PRAGMAS.items():
+        cur.execute(f"PRAGMA {name}={value}")
+    cur.close()
+
+def _track_writes(conn, cursor, statement, parameters, context, executemany):
+    written = tables_written(statement)
+    if written:
+        conn.info.setdefault("written_tables", set()).update(written)
+
+def _autocommit(dbapi_conn, _record):
+    # pysqlite abre transacciones implícitas por su cuenta y eso rompe SAVEPOINT
+    dbapi_conn.isolation_level = None
+
+def _begin_immediate(conn):
+    # Toma el candado de escritura al comenzar, no a mitad de la transacción
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+def make_engine(path=DB_PATH, readonly=False, writer=False):
+    if readonly:
+        eng = create_engine(f"sqlite:///file:{path}?mode=ro&uri=true", future=True, pool_size=8)
+    else:
+        eng = create_engine(f"sqlite:///{path}", future=True)
+    event.listen(eng, "connect", _apply_pragmas)
+    if writer:
+        event.listen(eng, "connect", _autocommit)
+        event.listen(eng, "begin", _begin_immediate)
+    event.listen(eng, "before_cursor_execute", _track_writes)
+    attach_instrumentation(eng)
+    return eng
+
+# `engine`: esquema, herramientas de línea de comandos y transaction()
+engine = make_engine()
+read_engine = make_engine(readonly=True)
+query_cache = QueryCache()
+# Tablas mantenidas por triggers: cambian cuando cambian sus tablas base. Las
+# cascadas de claves foráneas se registran al verificar el esquema (init_db).
+for _base in ("grades", "assessments", "enrollments"):
+    query_cache.add_dependents(_base, "enrollment_stats")
+query_cache.add_dependents("students", "students_fts")
+for _base in CHANGE_TRACKED:
+    query_cache.add_dependents(_base, "change_log")
+
+@contextmanager
+def transaction():
+    """engine.begin() que, tras el COMMIT, invalida el caché de las tablas escritas.
+
+    Para herramientas de un solo proceso (CLI); la app escribe con write()."""
+    written, scopes = set(), set()
+    with engine.begin() as conn:
+        conn.info.pop("written_tables", None)
+        conn.info.pop("write_scopes", None)
+        try:
+            yield conn
+        finally:
+            written = conn.info.pop("written_tables", set())
+            scopes = conn.info.pop("write_scopes", set())
+    # Se invalida después del COMMIT: una lectura concurrente que vio datos
+    # anteriores quedó guardada con la generación vieja y será descartada.
+    query_cache.bump(written, scopes)
+
+def write_scope(conn, table, scope):
+    """Declara que esta transacción escribe `table` sólo dentro de `scope`.
+
+    Si una transacción escribe la tabla sin declarar ámbito, se invalidan todos."""
+    conn.info.setdefault("write_scopes", set()).add((table, scope))
+
+def _tracked(fn, counter=None):
+    # Tablas y ámbitos de cada trabajo por separado: en un group commit, el ámbito
+    # declarado por un trabajo no debe acotar lo que escribió otro. Las sentencias
+    # del trabajo se cuentan en el rerun que lo encoló (`counter`).
+    def job(conn):
+        conn.info.pop("written_tables", None)
+        conn.info.pop("write_scopes", None)
+        try:
+            with counting_for(counter):
+                return fn(conn)
+        finally:
+            conn.info.setdefault("write_jobs", []).append(
+                (conn.info.pop("written_tables", set()), conn.info.pop("write_scopes", set())))
+    return job
+
+def _after_write(conn, committed):
+    jobs = conn.info.pop("write_jobs", [])
+    if committed:
+        for written, scopes in jobs:
+            query_cache.bump(written, scopes)
+
+writes = WriteQueue(make_engine(writer=True), after=_after_write)
+
+def write(fn, exclusive=False, timeout=None):
+    """Ejecuta `fn(conn)` en el hilo escritor y retorna su resultado (o relanza su error).
+
+    Los trabajos pequeños se confirman en grupo; `exclusive` corre solo en su
+    propia transacción (importaciones)."""
+    return writes.run(_tracked(fn, statement_counter()), exclusive, timeout)
+
+# --- Crear tablas ---
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def init_db():
+    """Verifica el esquema una sola vez por proceso (no en cada rerun)."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            ensure_tables()
+            _schema_ready = True
+
+def ensure_tables():
+    with engine.begin() as conn:
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS students(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run TEXT,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            email TEXT,
+            created_at TEXT
+        );"""))
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS subjects(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL
+        );"""))
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS enrollments(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            subject_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            UNIQUE(student_id,subject_id,year),
+            FOREIGN KEY(student_id) REFERENCES students(id) ON DELETE CASCADE,
+            FOREIGN KEY(subject_id) REFERENCES subjects(id) ON DELETE CASCADE
+        );"""))
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS assessments(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            date TEXT,
+            max_score REAL DEFAULT 100.0,
+            weight REAL DEFAULT 1.0,
+            FOREIGN KEY(subject_id) REFERENCES subjects(id) ON DELETE CASCADE
+        );"""))
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS grades(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            enrollment_id INTEGER NOT NULL,
+            assessment_id INTEGER NOT NULL,
+            score REAL,
+            UNIQUE(enrollment_id,assessment_id),
+            FOREIGN KEY(enrollment_id) REFERENCES enrollments(id) ON DELETE CASCADE,
+            FOREIGN KEY(assessment_id) REFERENCES assessments(id) ON DELETE CASCADE
+        );"""))
+        # --- Nuevas tablas para cursos ---
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS courses(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            UNIQUE(name, year)
+        );"""))
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS course_subjects(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id INTEGER NOT NULL,
+            subject_id INTEGER NOT NULL,
+            UNIQUE(course_id, subject_id),
+            FOREIGN KEY(course_id) REFERENCES courses(id) ON DELETE CASCADE,
+            FOREIGN KEY(subject_id) REFERENCES subjects(id) ON DELETE CASCADE
+        );"""))
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS student_courses(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            course_id INTEGER NOT NULL,
+            UNIQUE(student_id, course_id),
+            FOREIGN KEY(student_id) REFERENCES students(id) ON DELETE CASCADE,
+            FOREIGN KEY(course_id) REFERENCES courses(id) ON DELETE CASCADE
+        );"""))
+        # --- Índices y cambios posteriores (versionados en PRAGMA user_version) ---
+        migrate(conn)
+        register_cascades(conn)
+
+def register_cascades(conn):
+    """Registra en el caché las claves foráneas con acción: un DELETE/UPDATE en la
+    tabla padre también escribe la hija, aunque el SQL no la nombre."""
+    tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'")).scalars().all()
+    for child in tables:
+        # (id, seq, tabla padre, desde, hacia, on_update, on_delete, match)
+        for fk in conn.execute(text(f'PRAGMA foreign_key_list("{child}")')):
+            if {fk[5], fk[6]} - {"NO ACTION", "RESTRICT"}:
+                query_cache.add_dependents(fk[2], child)
+
+# --- Años archivados (ver archive.py) ---
+ARCHIVED_TABLES = ("enrollments", "enrollment_stats", "assessments", "grades")
+
+def archive_path(year):
+    """Archivo del año cerrado, junto a la base principal (school_2023.db)."""
+    base, ext = os.path.splitext(DB_PATH)
+    return f"{base}_{int(year)}{ext}"
+
+def archived_years():
+    """{año: ruta del archivo} de los años cerrados."""
+    df = q("SELECT year, path FROM archived_years")
+    folder = os.path.dirname(DB_PATH)
+    return {int(y): os.path.join(folder, p) for y, p in zip(df.get("year", []), df.get("path", []))}
+
+YEARS_SQL = "SELECT DISTINCT year FROM enrollments"
+
+def all_years():
+    """Años con matrículas (base principal y archivos), del más reciente al más antiguo."""
+    hot = q(YEARS_SQL)
+    return sorted({int(y) for y in hot.get("year", [])} | set(archived_years()), reverse=True)
+
+@contextmanager
+def read_conn(year=None):
+    """Conexión de lectura; si `year` está archivado, sus tablas se leen del archivo.
+
+    El archivo se adjunta en sólo lectura y vistas temporales con el nombre de
+    cada tabla de ARCHIVED_TABLES tapan a las de la base principal, así el mismo
+    SQL sirve para años abiertos y cerrados. Al salir se quitan antes de devolver
+    la conexión al pool."""
+    path = archived_years().get(int(year)) if year is not None else None
+    with read_engine.connect() as conn:
+        if path is None:
+            yield conn
+            return
+        conn.exec_driver_sql("ATTACH DATABASE ? AS arch", (f"file:{path}?mode=ro",))
+        try:
+            for t in ARCHIVED_TABLES:
+                conn.exec_driver_sql(f"CREATE TEMP VIEW {t} AS SELECT * FROM arch.{t}")
+            yield conn
+        finally:
+            conn.rollback()
+            try:
+                for t in ARCHIVED_TABLES:
+                    conn.exec_driver_sql(f"DROP VIEW IF EXISTS temp.{t}")
+                conn.exec_driver_sql("DETACH DATABASE arch")
+            except Exception:
+                # Nunca devolver al pool una conexión con el archivo adjunto
+                conn.invalidate()
+
+def _run_query(sql, params, columnar=False, categories=(), year=None):
+    import pandas as pd
+    from columnar import frame_from_result
+    with read_conn(year) as conn:
+        res = conn.execute(text(sql), params or {})
+        try:
+            if columnar:
+                df = frame_from_result(res, categories)
+            else:
+                df = pd.DataFrame(res.fetchall(), columns=res.keys())
+        except Exception:
+            return pd.DataFrame()
+        note_rows(len(df))
+        return df
+
+def q(sql, params=None, cached=True, columnar=False, categories=(), year=None):
+    """SELECT -> DataFrame, desde el caché si las tablas leídas no cambiaron.
+
+    `columnar` lee el cursor por lotes a columnas tipadas (menos memoria en
+    resultados grandes, ver columnar.py); `categories` son columnas de texto
+    que quedan como categóricas. `year` indica el año que consulta la página:
+    si está archivado, se lee de su archivo (read_conn)."""
+    if year is not None and int(year) not in archived_years():
+        year = None
+    run = lambda: _run_query(sql, params, columnar, categories, year)
+    if not (cached and is_cacheable(sql)):
+        return run()
+    key = query_cache.key(sql, params)
+    if columnar:
+        # Los dtypes difieren del modo por filas: entradas separadas
+        key = key + (tuple(sorted(categories)),)
+    if year is not None:
+        # El mismo SQL sin el año en los parámetros da otro resultado sobre el archivo
+        key = key + (("archivo", int(year)),)
+    try:
+        hash(key)
+    except TypeError:
+        return run()
+    tables = tables_read(sql)
+    df = query_cache.get(key, tables)
+    if df is None:
+        gen = query_cache.generation(tables)
+        df = run()
+        query_cache.put(key, gen, df)
+    return df
+
+def q_chunks(sql, params=None, chunk_rows=50_000, categories=(), year=None):
+    """Itera el resultado en DataFrames de a lo más `chunk_rows` filas, sin caché.
+
+    Para exportaciones: la memoria no crece con el tamaño del resultado. La
+    conexión de lectura queda tomada hasta terminar (o descartar) el iterador."""
+    from columnar import iter_frames
+    with read_conn(year) as conn:
+        res = conn.execute(text(sql), params or {})
+        rows = 0
+        for df in iter_frames(res, chunk_rows, categories):
+            rows += len(df)
+            yield df
+        note_rows(rows)
+
+def exec_sql(sql, params=None):
+    write(lambda conn: conn.execute(text(sql), params or {}))
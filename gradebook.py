@@ -0,0 +1,150 @@
+# === Libro de notas: matriz estudiantes × evaluaciones ===
+# Una consulta trae las notas de una asignatura y año en formato largo y se
+# arman, sin pivot de pandas, arreglos NumPy alineados: `scores` (una fila por
+# matrícula, una columna por evaluación, NaN = sin nota) con sus arreglos de
+# filas (matrícula, estudiante) y columnas (evaluación, título, puntaje máximo,
+# ponderación). Promedio y nota se calculan vectorizados sobre la matriz.
+#
+# El libro queda en caché por proceso hasta que cambie una nota de esa
+# asignatura (ámbito ("grades", asignatura), ver db.write_scope) o cambien
+# matrículas, estudiantes o evaluaciones.
+#
+# Uso:  python gradebook.py check --year 2025   -> compara promedios con enrollment_stats
+import argparse, sys
+import numpy as np
+import pandas as pd
+from cache import Memo
+from db import q, query_cache
+from grading import pct_to_chilean_array
+
+GRADEBOOK_SQL = """
+    SELECT e.id AS enrollment_id, st.first_name||' '||st.last_name AS estudiante,
+           a.id AS assessment_id, a.title, a.date, a.max_score, a.weight, g.score
+    FROM enrollments e
+    JOIN students st ON st.id=e.student_id
+    LEFT JOIN grades g ON g.enrollment_id=e.id
+    LEFT JOIN assessments a ON a.id=g.assessment_id
+    WHERE e.subject_id=:s AND e.year=:y
+"""
+# Tablas cuyo cambio (en cualquier ámbito) invalida un libro
+_TABLES = ("enrollments", "students", "assessments", "subjects")
+
+class Gradebook:
+    """Matriz de notas de una asignatura/año con sus ejes. Los arreglos son de sólo lectura."""
+
+    def __init__(self, enrollment_ids, students, assessment_ids, titles, max_score, weight, scores):
+        self.enrollment_ids = enrollment_ids
+        self.students = students
+        self.assessment_ids = assessment_ids
+        self.titles = titles
+        self.max_score = max_score
+        self.weight = weight
+        self.scores = scores
+        for a in vars(self).values():
+            a.flags.writeable = False
+
+    @classmethod
+    def from_rows(cls, df):
+        """Arma la matriz desde el resultado de GRADEBOOK_SQL (formato largo)."""
+        # Filas: una por matrícula, ordenadas por nombre
+        enr, first, einv = np.unique(df["enrollment_id"].to_numpy(dtype=np.int64),
+                                     return_index=True, return_inverse=True)
+        names = df["estudiante"].to_numpy(dtype=object)[first]
+        order = np.lexsort((enr, names.astype(str)))
+        row_of = np.empty(len(order), dtype=np.intp)
+        row_of[order] = np.arange(len(order))
+
+        # Columnas: evaluaciones con al menos una nota, por fecha
+        graded = df["assessment_id"].notna().to_numpy()
+        aid, afirst, ainv = np.unique(df["assessment_id"].to_numpy()[graded].astype(np.int64),
+                                      return_index=True, return_inverse=True)
+        cols = df[graded].iloc[afirst]
+        corder = np.lexsort((aid, cols["date"].fillna("").to_numpy(dtype=str)))
+        col_of = np.empty(len(corder), dtype=np.intp)
+        col_of[corder] = np.arange(len(corder))
+
+        scores = np.full((len(enr), len(aid)), np.nan)
+        scores[row_of[einv[graded]], col_of[ainv]] = pd.to_numeric(
+            df["score"][graded], errors="coerce").to_numpy(dtype=float)
+        return cls(enr[order], names[order], aid[corder], cols["title"].to_numpy(dtype=object)[corder],
+                   cols["max_score"].to_numpy(dtype=float)[corder],
+                   cols["weight"].to_numpy(dtype=float)[corder], scores)
+
+    @property
+    def shape(self):
+        return self.scores.shape
+
+    def percentages(self):
+        """Matriz en % del puntaje máximo (NaN si no hay nota o max_score es 0)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.max_score != 0, self.scores / self.max_score * 100, np.nan)
+
+    def averages(self):
+        """Promedio ponderado (%) por fila, con la misma regla que enrollment_stats."""
+        pct = self.percentages()
+        w = np.where(np.isnan(pct) | np.isnan(self.weight), 0.0, self.weight)
+        num = np.nansum(pct * w, axis=1) if pct.size else np.zeros(len(pct))
+        den = w.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(den != 0, num / den, np.nan)
+
+    def frame(self, scale):
+        """Libro ancho para mostrar: estudiante, una columna por evaluación, promedio y nota."""
+        min_note, pass_pct, max_note = scale
+        titles = list(self.titles)
+        # Títulos repetidos quedarían como columnas duplicadas
+        seen = {}
+        for i, t in enumerate(titles):
+            seen[t] = seen.get(t, 0) + 1
+            if seen[t] > 1:
+                titles[i] = f"{t} ({seen[t]})"
+        df = pd.DataFrame(self.scores, columns=titles)
+        df.insert(0, "Estudiante", self.students)
+        avg = np.round(self.averages(), 2)
+        df["Promedio (%)"] = avg
+        df["Nota (1–7)"] = pct_to_chilean_array(avg, min_note, pass_pct, max_note)
+        return df
+
+_books = Memo(maxsize=32)
+
+def load(subject_id, year):
+    """Libro de notas de (asignatura, año), desde caché si nada relevante cambió."""
+    key = (int(subject_id), int(year))
+    gen = (query_cache.generation(_TABLES), query_cache.scoped_generation("grades", key[0]))
+    # Formato largo: nombre y título se repiten por cada nota, van como categóricas
+    return _books.get_or_build(key, gen, lambda: Gradebook.from_rows(
+        q(GRADEBOOK_SQL, {"s":key[0], "y":key[1]}, cached=False, columnar=True,
+          categories=("estudiante", "title"), year=key[1])))
+
+def check(conn, year):
+    """Compara los promedios del libro con enrollment_stats. Retorna las diferencias."""
+    from sqlalchemy import text
+    stats = dict(conn.execute(text("""
+        SELECT es.enrollment_id, es.sum_wpct / es.sum_weight * 100
+        FROM enrollment_stats es JOIN enrollments e ON e.id=es.enrollment_id
+        WHERE e.year=:y AND es.sum_weight <> 0"""), {"y":year}).fetchall())
+    subjects = [r[0] for r in conn.execute(text(
+        "SELECT DISTINCT subject_id FROM enrollments WHERE year=:y"), {"y":year})]
+    bad = []
+    for s in subjects:
+        book = load(s, year)
+        for e, avg in zip(book.enrollment_ids.tolist(), book.averages().tolist()):
+            want = stats.get(e)
+            if (want is None) != np.isnan(avg) or (want is not None and abs(want - avg) > 1e-9):
+                bad.append((s, e, want, avg))
+    return bad
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Libro de notas (matriz estudiantes × evaluaciones).")
+    ap.add_argument("cmd", choices=["check"])
+    ap.add_argument("--year", type=int, required=True)
+    args = ap.parse_args()
+
+    from db import init_db, read_conn
+    init_db()
+    with read_conn(args.year) as conn:
+        bad = check(conn, args.year)
+    for b in bad[:20]:
+        print(b)
+    print(f"{len(bad)} diferencias.")
+    sys.exit(1 if bad else 0)
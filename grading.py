@@ -0,0 +1,122 @@
+# === Conversión a escala chilena y promedios ponderados ===
+# pct_to_chilean es la versión escalar original; pct_to_chilean_array aplica la
+# misma fórmula (mismo orden de operaciones, redondeo y límites) sobre arreglos
+# NumPy en una sola pasada. weighted_means agrupa un libro de notas completo.
+#
+# Uso:  python grading.py check   -> compara vectorizado vs escalar (aleatorio + bordes)
+#       python grading.py bench   -> micro-benchmark escalar vs vectorizado
+import sys, time
+import numpy as np
+
+def pct_to_chilean(pct, min_note=1.0, pass_pct=60, max_note=7.0):
+    pct = max(0.0, min(100.0, float(pct)))
+    if pct >= pass_pct:
+        # Mapea lineal: pass_pct -> 4.0, 100 -> max_note
+        if 100 - pass_pct == 0:
+            return 4.0
+        val = 4.0 + (pct - pass_pct) * (max_note - 4.0) / (100 - pass_pct)
+    else:
+        # Mapea lineal: 0 -> min_note, pass_pct -> 4.0
+        if pass_pct == 0:
+            return min_note
+        val = min_note + (pct) * (4.0 - min_note) / (pass_pct)
+    return round(max(min_note, min(max_note, val)), 1)
+
+def round1(x):
+    """round(x, 1) de Python (redondeo decimal exacto, mitades al par) sobre un arreglo.
+
+    np.round escala por 10 y puede diferir en los casi-empates (p.ej. 0.15, que en
+    binario es 0.1499...); esos pocos casos se resuelven con round() escalar."""
+    x = np.asarray(x, dtype=float)
+    y = x * 10.0
+    out = np.rint(y) / 10.0
+    near_tie = np.abs(y - np.floor(y) - 0.5) < 1e-9
+    if near_tie.any():
+        out[near_tie] = [round(float(v), 1) for v in x[near_tie]]
+    return out
+
+def pct_to_chilean_array(pct, min_note=1.0, pass_pct=60, max_note=7.0):
+    """Versión vectorizada de pct_to_chilean. Los NaN (sin nota) se mantienen NaN."""
+    p = np.maximum(0.0, np.minimum(100.0, np.asarray(pct, dtype=float)))
+    above = p >= pass_pct
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hi = 4.0 + (p - pass_pct) * (max_note - 4.0) / (100 - pass_pct)
+        lo = min_note + (p) * (4.0 - min_note) / (pass_pct)
+    val = np.where(above, hi, lo)
+    out = round1(np.maximum(min_note, np.minimum(max_note, val)))
+    # Casos borde del escalar: se retornan sin acotar ni redondear
+    if 100 - pass_pct == 0:
+        out[above] = 4.0
+    if pass_pct == 0:
+        out[~above & ~np.isnan(p)] = min_note
+    return out
+
+def weighted_means(groups, values, weights, n_groups=None):
+    """Promedio ponderado de `values` por grupo.
+
+    `groups` son códigos enteros 0..n-1 (p.ej. de pd.factorize). Las entradas con
+    valor o ponderación NaN no cuentan. Grupos sin ponderación quedan en NaN."""
+    groups = np.asarray(groups, dtype=np.intp)
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    ok = ~(np.isnan(values) | np.isnan(weights))
+    n = n_groups if n_groups is not None else (int(groups.max()) + 1 if groups.size else 0)
+    num = np.bincount(groups[ok], weights=values[ok] * weights[ok], minlength=n)
+    den = np.bincount(groups[ok], weights=weights[ok], minlength=n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den != 0, num / den, np.nan)
+
+# --- Verificación y benchmark (línea de comandos) ---
+def _scales(rng, n):
+    fixed = [(1.0, 60, 7.0), (1.0, 0, 7.0), (1.0, 100, 7.0), (2.0, 50, 6.0), (1.0, 1, 7.0), (1.0, 99, 7.0)]
+    rand = [(round(rng.uniform(1.0, 4.0), 1), int(rng.integers(0, 101)), round(rng.uniform(4.0, 7.0), 1))
+            for _ in range(n)]
+    return fixed + rand
+
+def self_check(n_scales=200, n_values=2000, seed=0):
+    """Compara pct_to_chilean_array con pct_to_chilean. Retorna la lista de discrepancias."""
+    rng = np.random.default_rng(seed)
+    edges = np.array([-5.0, 0.0, 0.05, 0.15, 0.25, 1e-12, 49.95, 50.0, 59.99, 60.0, 60.01,
+                      99.95, 100.0, 100.0000001, 250.0])
+    bad = []
+    for min_note, pass_pct, max_note in _scales(rng, n_scales):
+        pct = np.concatenate([edges, [pass_pct, pass_pct - 0.05, pass_pct + 0.05],
+                              rng.uniform(-10, 110, n_values),
+                              np.round(rng.uniform(0, 100, n_values), 2)])
+        got = pct_to_chilean_array(pct, min_note, pass_pct, max_note)
+        for p, g in zip(pct, got):
+            want = pct_to_chilean(p, min_note, pass_pct, max_note)
+            if g != want:
+                bad.append(((min_note, pass_pct, max_note), float(p), want, float(g)))
+    # Promedios ponderados contra la fórmula directa por grupo
+    groups = rng.integers(0, 50, n_values)
+    values, weights = rng.uniform(0, 1, n_values), rng.uniform(0.5, 3, n_values)
+    means = weighted_means(groups, values, weights, 50)
+    for k in range(50):
+        m = groups == k
+        want = (values[m] * weights[m]).sum() / weights[m].sum() if m.any() else np.nan
+        if not (np.isnan(want) and np.isnan(means[k])) and abs(means[k] - want) > 1e-12:
+            bad.append(("weighted_means", k, want, float(means[k])))
+    return bad
+
+def bench(n=200_000, seed=0):
+    import pandas as pd
+    pct = pd.Series(np.random.default_rng(seed).uniform(0, 100, n))
+    t0 = time.perf_counter()
+    pct.apply(lambda p: pct_to_chilean(p, 1.0, 60, 7.0))
+    t1 = time.perf_counter()
+    pct_to_chilean_array(pct.to_numpy(), 1.0, 60, 7.0)
+    t2 = time.perf_counter()
+    return {"filas":n, "escalar_s":round(t1 - t0, 4), "vectorizado_s":round(t2 - t1, 4),
+            "aceleracion":round((t1 - t0) / max(t2 - t1, 1e-9), 1)}
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if cmd == "bench":
+        print(bench())
+    else:
+        bad = self_check()
+        for b in bad[:20]:
+            print(b)
+        print(f"{len(bad)} discrepancias.")
+        sys.exit(1 if bad else 0)
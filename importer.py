@@ -0,0 +1,404 @@
+# === Importación masiva por conjuntos ===
+# Carga las hojas en tablas temporales (staging) con executemany y resuelve
+# estudiantes, vínculos al curso y matrículas con unos pocos INSERT ... SELECT,
+# en vez de varias consultas por fila.
+#
+# Para archivos grandes, import_file_stream lee filas en streaming (openpyxl
+# read_only o CSV), procesa bloques de tamaño fijo con una transacción por
+# bloque y guarda un punto de control para poder reanudar.
+#
+# Uso:  python importer.py planilla.xlsx --course "7°B" --year 2025 [--subjects asignaturas.csv]
+import argparse, csv, hashlib, io, os, sys, time
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import text
+
+STUDENT_COLS = ["run","first_name","last_name","email"]
+SUBJECT_COLS = ["code","name"]
+
+def read_workbook(file):
+    """Lee las hojas `estudiantes` y `asignaturas` de un .xlsx (ruta o archivo)."""
+    xls = pd.ExcelFile(file)
+    df_students = pd.read_excel(xls, "estudiantes").fillna("")
+    df_subjects = pd.read_excel(xls, "asignaturas").fillna("")
+    return df_students, df_subjects
+
+def _records(df, cols):
+    # Normaliza nombres de columnas (la validación ya es case-insensitive)
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+    present = [c for c in cols if c in df.columns]
+    out = []
+    for row in df[present].itertuples(index=False):
+        rec = dict.fromkeys(cols, "")
+        rec.update({c: str(v).strip() for c, v in zip(present, row)})
+        out.append(rec)
+    return out
+
+class _Phases:
+    """Acumula (fase, filas, segundos) para el resumen de importación."""
+    def __init__(self):
+        self.rows = []
+        self._t = time.perf_counter()
+
+    def mark(self, fase, filas):
+        now = time.perf_counter()
+        self.rows.append({"fase":fase, "filas":int(filas), "segundos":round(now - self._t, 4)})
+        self._t = now
+
+def _clean_subjects(records):
+    return [r for r in records if r["code"] and r["name"]]
+
+def _clean_students(records):
+    """Filas válidas (con nombre y apellido) listas para staging, y cuántas se descartaron."""
+    students, rejected = [], 0
+    for r in records:
+        if not r["first_name"] or not r["last_name"]:
+            rejected += 1
+            continue
+        r["run"] = r["run"] or None
+        r["email"] = r["email"] or None
+        r["email_lc"] = r["email"].lower() if r["email"] else None
+        students.append(r)
+    return students, rejected
+
+def import_course(conn, course_name, year, df_students, df_subjects):
+    """Importa un curso completo dentro de la transacción `conn`.
+
+    Retorna un dict con course_id, created_students, created_subjects y
+    `phases` (lista de {fase, filas, segundos})."""
+    students, _ = _clean_students(_records(df_students, STUDENT_COLS))
+    return import_records(conn, course_name, year, students, _clean_subjects(_records(df_subjects, SUBJECT_COLS)))
+
+# --- Sentencias de import_records (migrations.py explain revisa sus planes) ---
+DROP_STAGING_SQL = ["DROP TABLE IF EXISTS temp.stg_new", "DROP TABLE IF EXISTS temp.stg_students",
+                    "DROP TABLE IF EXISTS temp.stg_subjects"]
+STAGING_SQL = DROP_STAGING_SQL + [
+    """CREATE TEMP TABLE stg_subjects(
+        pos INTEGER PRIMARY KEY, code TEXT NOT NULL, name TEXT NOT NULL)""",
+    """CREATE TEMP TABLE stg_students(
+        pos INTEGER PRIMARY KEY, run TEXT, first_name TEXT NOT NULL, last_name TEXT NOT NULL,
+        email TEXT, email_lc TEXT, student_id INTEGER, canon INTEGER)""",
+    # Sin estos índices la deduplicación dentro de la planilla es cuadrática
+    "CREATE INDEX temp.stg_students_run ON stg_students(run, pos)",
+    "CREATE INDEX temp.stg_students_email ON stg_students(email_lc, pos)",
+    # Con clave: ASSIGN_IDS_SQL la busca por pos en cada fila (sin ella, cuadrático)
+    "CREATE TEMP TABLE stg_new(pos INTEGER PRIMARY KEY, rn INTEGER NOT NULL)",
+]
+COURSE_SQL = "INSERT OR IGNORE INTO courses(name, year) VALUES(:n,:y)"
+COURSE_ID_SQL = "SELECT id FROM courses WHERE name=:n AND year=:y"
+SUBJECTS_SQL = """INSERT OR IGNORE INTO subjects(code,name)
+                  SELECT code, name FROM stg_subjects ORDER BY pos"""
+COURSE_SUBJECTS_SQL = """INSERT OR IGNORE INTO course_subjects(course_id,subject_id)
+                         SELECT DISTINCT :cid, su.id FROM stg_subjects stg
+                         JOIN subjects su ON su.code=stg.code"""
+# El "+" quita la afinidad TEXT de email_lc; sin él SQLite no usa el índice lower(email)
+RESOLVE_SQL = """
+    UPDATE stg_students SET student_id = COALESCE(
+        (SELECT MIN(s.id) FROM students s WHERE s.run = stg_students.run),
+        (SELECT MIN(s.id) FROM students s WHERE lower(s.email) = +stg_students.email_lc))
+"""
+# Una fila repetida apunta a la primera fila anterior con el mismo RUN o email.
+DEDUP_SQL = """
+    UPDATE stg_students SET canon = COALESCE(
+        (SELECT MIN(s2.pos) FROM stg_students s2
+         WHERE s2.student_id IS NULL AND s2.pos < stg_students.pos AND s2.run = stg_students.run),
+        (SELECT MIN(s2.pos) FROM stg_students s2
+         WHERE s2.student_id IS NULL AND s2.pos < stg_students.pos AND s2.email_lc = stg_students.email_lc),
+        pos)
+    WHERE student_id IS NULL
+"""
+# Colapsar cadenas (fila C -> B -> A) hasta que todas apunten a una fila canónica
+COLLAPSE_SQL = """
+    UPDATE stg_students SET canon = (SELECT s2.canon FROM stg_students s2 WHERE s2.pos = stg_students.canon)
+    WHERE student_id IS NULL
+      AND canon <> (SELECT s2.canon FROM stg_students s2 WHERE s2.pos = stg_students.canon)
+"""
+NEW_ROWS_SQL = """INSERT INTO stg_new(pos, rn)
+    SELECT pos, ROW_NUMBER() OVER (ORDER BY pos) AS rn
+    FROM stg_students WHERE student_id IS NULL AND canon = pos"""
+INSERT_STUDENTS_SQL = """
+    INSERT INTO students(run,first_name,last_name,email,created_at)
+    SELECT s.run, s.first_name, s.last_name, s.email, :c
+    FROM stg_students s JOIN stg_new n ON n.pos = s.pos
+    ORDER BY n.rn
+"""
+ASSIGN_IDS_SQL = """
+    UPDATE stg_students SET student_id = :first - 1 +
+        (SELECT n.rn FROM stg_new n WHERE n.pos = stg_students.canon)
+    WHERE student_id IS NULL
+"""
+LINK_SQL = """INSERT OR IGNORE INTO student_courses(student_id,course_id)
+              SELECT DISTINCT student_id, :cid FROM stg_students"""
+ENROLL_SQL = """
+    INSERT OR IGNORE INTO enrollments(student_id,subject_id,year)
+    SELECT DISTINCT s.student_id, cs.subject_id, :y
+    FROM stg_students s CROSS JOIN course_subjects cs
+    WHERE cs.course_id = :cid
+"""
+
+def import_records(conn, course_name, year, students, subjects):
+    """Núcleo de import_course sobre filas ya limpias (ver _clean_students)."""
+    ph = _Phases()
+    year = int(year)
+
+    # --- Staging ---
+    for sql in STAGING_SQL:
+        conn.execute(text(sql))
+    if subjects:
+        conn.execute(text("INSERT INTO stg_subjects(code,name) VALUES(:code,:name)"), subjects)
+    if students:
+        conn.execute(text("""INSERT INTO stg_students(run,first_name,last_name,email,email_lc)
+                             VALUES(:run,:first_name,:last_name,:email,:email_lc)"""), students)
+    ph.mark("staging", len(students) + len(subjects))
+
+    # --- Curso y asignaturas ---
+    conn.execute(text(COURSE_SQL), {"n":course_name, "y":year})
+    course_id = conn.execute(text(COURSE_ID_SQL), {"n":course_name, "y":year}).scalar()
+    conn.execute(text(SUBJECTS_SQL))
+    conn.execute(text(COURSE_SUBJECTS_SQL), {"cid":course_id})
+    ph.mark("asignaturas", len(subjects))
+
+    # --- Resolver estudiantes existentes: por RUN, luego por email ---
+    conn.execute(text(RESOLVE_SQL))
+    existing = conn.execute(text("SELECT COUNT(*) FROM stg_students WHERE student_id IS NOT NULL")).scalar()
+    ph.mark("resolver existentes", existing)
+
+    # --- Crear estudiantes nuevos (deduplicando filas repetidas de la planilla) ---
+    conn.execute(text(DEDUP_SQL))
+    while conn.execute(text(COLLAPSE_SQL)).rowcount:
+        pass
+
+    conn.execute(text(NEW_ROWS_SQL))
+    created_students = conn.execute(text(INSERT_STUDENTS_SQL), {"c":datetime.utcnow().isoformat()}).rowcount
+    if created_students:
+        # Los ids de un mismo INSERT ... SELECT son consecutivos dentro de la transacción
+        first_id = conn.execute(text("SELECT last_insert_rowid()")).scalar() - created_students + 1
+        conn.execute(text(ASSIGN_IDS_SQL), {"first":first_id})
+    ph.mark("crear estudiantes", created_students)
+
+    # --- Vincular al curso y matricular en todas sus asignaturas ---
+    linked = conn.execute(text(LINK_SQL), {"cid":course_id}).rowcount
+    ph.mark("vincular curso", linked)
+    enrolled = conn.execute(text(ENROLL_SQL), {"cid":course_id, "y":year}).rowcount
+    ph.mark("matrículas", enrolled)
+
+    for sql in DROP_STAGING_SQL:
+        conn.execute(text(sql))
+    return {"course_id":course_id, "created_students":created_students,
+            "created_subjects":len(subjects), "phases":ph.rows}
+
+# --- Importación en streaming por bloques ---
+def _rewind(file):
+    # Rutas se pasan tal cual; archivos subidos (UploadedFile/BytesIO) se rebobinan
+    if not isinstance(file, (str, os.PathLike)):
+        file.seek(0)
+    return file
+
+def _open_binary(file):
+    return open(file, "rb") if isinstance(file, (str, os.PathLike)) else _rewind(file)
+
+def file_digest(file):
+    """sha256 del archivo, leído por bloques (identifica el archivo para reanudar)."""
+    f = _open_binary(file)
+    h = hashlib.sha256()
+    try:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    finally:
+        if f is not file:
+            f.close()
+        else:
+            f.seek(0)
+    return h.hexdigest()
+
+def _file_name(file):
+    return str(file if isinstance(file, (str, os.PathLike)) else getattr(file, "name", "")).lower()
+
+def _row(header, values, cols):
+    rec = dict.fromkeys(cols, "")
+    for h, v in zip(header, values):
+        if h in rec and v is not None:
+            rec[h] = str(v).strip()
+    return rec
+
+def _check_header(header, need, where):
+    if not set(need).issubset(header):
+        raise ValueError(f"{where} debe tener columnas al menos: {', '.join(need)}.")
+
+def sheet_rows(wb, sheet, cols, need):
+    """(total_estimado, iterador de filas) de una hoja de un libro ya abierto (read_only)."""
+    if sheet not in wb.sheetnames:
+        raise ValueError(f"Falta la hoja '{sheet}'.")
+    ws = wb[sheet]
+    rows = ws.iter_rows(values_only=True)
+    header = [str(c).strip().lower() if c is not None else "" for c in next(rows, ())]
+    _check_header(header, need, f"Hoja '{sheet}'")
+    total = (ws.max_row - 1) if ws.max_row else None
+    gen = (_row(header, values, cols) for values in rows
+           if values and any(v is not None and str(v).strip() for v in values))
+    return total, gen
+
+def xlsx_rows(file, sheet, cols, need):
+    """(total_estimado, iterador de filas) de una hoja, sin cargarla completa."""
+    from openpyxl import load_workbook
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        total, rows = sheet_rows(wb, sheet, cols, need)
+    except ValueError:
+        wb.close()
+        raise
+
+    def gen():
+        try:
+            yield from rows
+        finally:
+            wb.close()
+    return total, gen()
+
+def csv_rows(file, cols, need, where="El CSV"):
+    """(total, iterador de filas) de un CSV (`,` `;` o tabulador), leído en streaming."""
+    f = _open_binary(file)
+    stream = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+
+    def close():
+        stream.detach()
+        if f is not file:
+            f.close()
+
+    try:
+        total = sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b"")) - 1
+        f.seek(0)
+        sample = stream.read(4096)
+        stream.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(stream, dialect)
+        header = [c.strip().lower() for c in next(reader, [])]
+        _check_header(header, need, where)
+    except Exception:
+        close()
+        raise
+
+    def gen():
+        try:
+            for values in reader:
+                if any(v.strip() for v in values):
+                    yield _row(header, values, cols)
+        finally:
+            close()
+    return max(total, 0), gen()
+
+def _checkpoint(conn, key):
+    return conn.execute(text("SELECT rows_done FROM import_checkpoints WHERE source_key=:k"),
+                        {"k":key}).scalar() or 0
+
+def _save_checkpoint(conn, key, course_id, rows_done):
+    conn.execute(text("""INSERT INTO import_checkpoints(source_key, course_id, rows_done, updated_at)
+                         VALUES(:k,:c,:n,:t)
+                         ON CONFLICT(source_key) DO UPDATE SET rows_done=excluded.rows_done,
+                                                               updated_at=excluded.updated_at"""),
+                 {"k":key, "c":course_id, "n":rows_done, "t":datetime.utcnow().isoformat()})
+
+def import_stream(write, course_name, year, students, subjects, chunk_size=2000,
+                  source_key=None, total=None, progress=None):
+    """Importa `students` (iterador de filas) en bloques de `chunk_size`.
+
+    `write(fn)` ejecuta fn(conn) en una transacción y retorna su resultado (db.write);
+    cada bloque y su punto de control se confirman juntos, así una importación interrumpida se reanuda
+    saltando las filas ya confirmadas. `progress(filas, total)` se llama por bloque."""
+    summary = {"created_students":0, "created_subjects":0, "rows":0, "rejected":0,
+               "resumed_from":0, "chunks":0}
+    phases = {}
+
+    def add_phases(rows):
+        for p in rows:
+            acc = phases.setdefault(p["fase"], {"fase":p["fase"], "filas":0, "segundos":0.0})
+            acc["filas"] += p["filas"]
+            acc["segundos"] = round(acc["segundos"] + p["segundos"], 4)
+
+    # Curso y asignaturas (pequeñas) en su propia transacción
+    subjects = _clean_subjects(list(subjects))
+
+    def setup(conn):
+        r = import_records(conn, course_name, year, [], subjects)
+        return r, _checkpoint(conn, source_key) if source_key else 0
+    r, done = write(setup, exclusive=True)
+    course_id = r["course_id"]
+    summary["created_subjects"] = r["created_subjects"]
+    summary["resumed_from"] = done
+    add_phases(r["phases"])
+
+    pos = 0
+    chunk = []
+
+    def flush():
+        rows, rejected = _clean_students(chunk)
+
+        def apply(conn):
+            r = import_records(conn, course_name, year, rows, [])
+            if source_key:
+                _save_checkpoint(conn, source_key, course_id, pos)
+            return r
+        # Un trabajo por bloque: entre bloques el escritor atiende a las demás sesiones
+        r = write(apply, exclusive=True)
+        summary["created_students"] += r["created_students"]
+        summary["rows"] += len(rows)
+        summary["rejected"] += rejected
+        summary["chunks"] += 1
+        add_phases(r["phases"])
+        chunk.clear()
+        if progress:
+            progress(pos, total)
+
+    for rec in students:
+        pos += 1
+        if pos <= done:
+            continue
+        chunk.append(rec)
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    if source_key:
+        write(lambda conn: conn.execute(text("DELETE FROM import_checkpoints WHERE source_key=:k"),
+                                        {"k":source_key}))
+    if progress:
+        progress(pos, total)
+    summary.update(course_id=course_id, phases=list(phases.values()))
+    return summary
+
+def import_file_stream(write, course_name, year, file, subjects_file=None, chunk_size=2000, progress=None):
+    """Importación por bloques desde un .xlsx (hojas estudiantes/asignaturas) o un CSV de
+    estudiantes (+ CSV opcional de asignaturas; si falta, se usan las del curso)."""
+    key = f"{file_digest(file)}:{course_name}:{int(year)}"
+    if _file_name(file).endswith(".csv"):
+        total, students = csv_rows(file, STUDENT_COLS, ["first_name","last_name"], "El CSV de estudiantes")
+        subjects = []
+        if subjects_file is not None:
+            _, subjects = csv_rows(subjects_file, SUBJECT_COLS, SUBJECT_COLS, "El CSV de asignaturas")
+    else:
+        _, subjects = xlsx_rows(_rewind(file), "asignaturas", SUBJECT_COLS, SUBJECT_COLS)
+        subjects = list(subjects)
+        total, students = xlsx_rows(_rewind(file), "estudiantes", STUDENT_COLS, ["first_name","last_name"])
+    return import_stream(write, course_name, year, students, subjects, chunk_size,
+                         source_key=key, total=total, progress=progress)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Importación por bloques (xlsx o csv), reanudable.")
+    ap.add_argument("file")
+    ap.add_argument("--course", required=True)
+    ap.add_argument("--year", type=int, required=True)
+    ap.add_argument("--subjects", help="CSV de asignaturas (sólo si el archivo principal es CSV).")
+    ap.add_argument("--chunk", type=int, default=2000)
+    args = ap.parse_args()
+
+    from db import init_db, write
+    init_db()
+    report = lambda done, total: print(f"{done}/{total or '?'} filas", file=sys.stderr)
+    result = import_file_stream(write, args.course, args.year, args.file, args.subjects,
+                                chunk_size=args.chunk, progress=report)
+    for p in result.pop("phases"):
+        print(f"  {p['fase']:<20} {p['filas']:>8} filas {p['segundos']:>8.3f}s")
+    print(result)
@@ -0,0 +1,182 @@
+# === Instrumentación de consultas y páginas ===
+# Hooks de SQLAlchemy (before/after_cursor_execute) miden cada sentencia y la
+# agrupan por "forma" (SQL normalizado, sin literales). main() mide cada página
+# con page_timer(), que cuenta también las sentencias que el escritor corre por
+# ese rerun. Todo queda en memoria (histogramas acotados) y, si se define
+# SCHOOL_METRICS_JSONL, cada evento se agrega también a ese archivo JSONL.
+import json, os, re, threading, time
+from collections import deque
+from contextlib import contextmanager
+from sqlalchemy import event
+
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_STR_RE = re.compile(r"'(?:[^']|'')*'")
+_NUM_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+def normalize_sql(sql):
+    """Forma de la consulta: literales -> ?, listas IN colapsadas, espacios simples."""
+    s = _NUM_RE.sub("?", _STR_RE.sub("?", sql))
+    s = _LIST_RE.sub("(?, ...)", s)
+    return " ".join(s.split())
+
+class Histogram:
+    """Conteos por rango de ms + ventana de las últimas mediciones (percentiles)."""
+
+    def __init__(self, window=500):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=window)
+        self.n = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+
+    def add(self, ms, rows=None):
+        i = 0
+        while i < len(BUCKETS_MS) and ms >= BUCKETS_MS[i]:
+            i += 1
+        self.buckets[i] += 1
+        self.recent.append(ms)
+        self.n += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        if rows:
+            self.rows += rows
+
+    def snapshot(self):
+        ordered = sorted(self.recent)
+        pct = lambda p: round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3) if ordered else 0.0
+        return {"n":self.n, "total_ms":round(self.total_ms, 3),
+                "mean_ms":round(self.total_ms / self.n, 3) if self.n else 0.0,
+                "p50_ms":pct(0.50), "p95_ms":pct(0.95), "max_ms":round(self.max_ms, 3),
+                "rows":self.rows}
+
+class Metrics:
+    def __init__(self, sink=None, reruns=200):
+        self.queries = {}
+        self.pages = {}
+        self.reruns = deque(maxlen=reruns)
+        self.sink = sink
+        self._lock = threading.Lock()
+
+    def _emit(self, event_):
+        if not self.sink:
+            return
+        line = json.dumps(event_, ensure_ascii=False)
+        with self._lock, open(self.sink, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def record_query(self, shape, ms, rows=None):
+        with self._lock:
+            self.queries.setdefault(shape, Histogram()).add(ms, rows)
+        self._emit({"ts":time.time(), "kind":"query", "sql":shape, "ms":round(ms, 3), "rows":rows})
+
+    def add_rows(self, shape, rows):
+        with self._lock:
+            h = self.queries.get(shape)
+            if h is not None:
+                h.rows += rows
+
+    def record_page(self, name, ms, statements):
+        with self._lock:
+            self.pages.setdefault(name, Histogram()).add(ms)
+            self.reruns.append({"pagina":name, "ms":round(ms, 3), "sentencias":statements})
+        self._emit({"ts":time.time(), "kind":"page", "page":name, "ms":round(ms, 3),
+                    "statements":statements})
+
+    def slowest(self, limit=20, by="p95_ms"):
+        with self._lock:
+            rows = [dict(sql=shape, **h.snapshot()) for shape, h in self.queries.items()]
+        return sorted(rows, key=lambda r: r[by], reverse=True)[:limit]
+
+    def page_summary(self):
+        with self._lock:
+            per_page = {name: h.snapshot() for name, h in self.pages.items()}
+            reruns = list(self.reruns)
+        for name, snap in per_page.items():
+            counts = [r["sentencias"] for r in reruns if r["pagina"] == name]
+            snap["sentencias_ultima"] = counts[-1] if counts else 0
+            snap["sentencias_prom"] = round(sum(counts) / len(counts), 1) if counts else 0.0
+        return per_page
+
+    def histogram(self, shape):
+        with self._lock:
+            h = self.queries.get(shape)
+            return list(h.buckets) if h else []
+
+    def reset(self):
+        with self._lock:
+            self.queries.clear()
+            self.pages.clear()
+            self.reruns.clear()
+
+metrics = Metrics(sink=os.environ.get("SCHOOL_METRICS_JSONL"))
+# Cada sesión de Streamlit corre su script en su propio hilo
+_local = threading.local()
+
+class _Counter:
+    """Sentencias de un rerun; lo comparten el hilo de la página y el escritor."""
+    __slots__ = ("n",)
+
+    def __init__(self):
+        self.n = 0
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("instr_t0", []).append(time.perf_counter())
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("instr_t0")
+    if not starts:
+        return
+    ms = (time.perf_counter() - starts.pop()) * 1000
+    rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+    shape = normalize_sql(statement)
+    metrics.record_query(shape, ms, rows)
+    counter = getattr(_local, "counter", None)
+    if counter is not None:
+        counter.n += 1
+    _local.last_shape = shape
+
+def _error(context):
+    # Una sentencia que falla no llega a _after: se descarta su inicio para que
+    # la próxima no se mida contra él
+    starts = context.connection.info.get("instr_t0") if context.connection is not None else None
+    if starts and context.statement is not None:
+        starts.pop()
+
+def attach(engine):
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+    event.listen(engine, "handle_error", _error)
+
+def note_rows(rows):
+    """Filas leídas por la última consulta de este hilo (SELECT no informa rowcount)."""
+    shape = getattr(_local, "last_shape", None)
+    if shape is not None:
+        metrics.add_rows(shape, rows)
+
+def statement_counter():
+    """Contador del rerun en curso en este hilo (None fuera de page_timer)."""
+    return getattr(_local, "counter", None)
+
+@contextmanager
+def counting_for(counter):
+    """Suma a `counter` las sentencias de este hilo: el escritor (writer.py) corre
+    cada trabajo con el contador del rerun que lo encoló."""
+    prev = getattr(_local, "counter", None)
+    _local.counter = counter
+    try:
+        yield
+    finally:
+        _local.counter = prev
+
+@contextmanager
+def page_timer(name):
+    _local.counter = counter = _Counter()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.counter = None
+        metrics.record_page(name, (time.perf_counter() - t0) * 1000, counter.n)
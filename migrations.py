@@ -0,0 +1,243 @@
+# === Migraciones de esquema versionadas ===
+# La versión aplicada se guarda en PRAGMA user_version. Cada migración se aplica
+# una sola vez, en orden, dentro de la misma transacción que ensure_tables().
+# Para cambiar el esquema: agregar una entrada al final de MIGRATIONS (nunca
+# editar una ya publicada). `explain` revisa los planes de las sentencias que la
+# app ejecuta, tomadas de las constantes SQL de cada módulo (app_queries).
+#
+# Uso:  python migrations.py            -> aplica migraciones pendientes
+#       python migrations.py explain    -> EXPLAIN QUERY PLAN de las consultas de la app
+#       python migrations.py explain --check -> además falla (código 1) si alguna
+#           recorre una tabla completa dentro de una subconsulta correlacionada
+import sys
+from sqlalchemy import text
+
+# El SQL de cada migración queda escrito aquí tal como se publicó: no se arma con
+# funciones de otros módulos, que pueden cambiar después.
+
+# Migración 2: recálculo de enrollment_stats para las matrículas que cumplen
+# {where} (copia congelada de stats.py en esa versión)
+_STATS_REFRESH_V2 = """
+    INSERT INTO enrollment_stats(enrollment_id, sum_wpct, sum_weight, n)
+    SELECT e.id AS enrollment_id,
+           COALESCE(SUM(g.score / a.max_score * a.weight), 0.0) AS sum_wpct,
+           COALESCE(SUM(a.weight), 0.0) AS sum_weight,
+           COUNT(a.id) AS n
+    FROM enrollments e
+    LEFT JOIN grades g ON g.enrollment_id = e.id AND g.score IS NOT NULL
+    LEFT JOIN assessments a ON a.id = g.assessment_id AND a.max_score <> 0
+    WHERE {where}
+    GROUP BY e.id
+    ON CONFLICT(enrollment_id) DO UPDATE SET
+        sum_wpct = excluded.sum_wpct, sum_weight = excluded.sum_weight, n = excluded.n;
+"""
+
+# Migración 5: un trigger por tabla y operación que anota el id en change_log
+_LOG_TRIGGER_V5 = """CREATE TRIGGER IF NOT EXISTS trg_{table}_log_{name} AFTER {event} ON {table} BEGIN
+                INSERT INTO change_log(tbl, op, row_id) VALUES ('{table}', '{op}', {ref}.id);
+            END"""
+
+# (versión, descripción, pasos). Un paso es un SQL o una función conn -> None.
+MIGRATIONS = [
+    (1, "Índices para búsquedas frecuentes", [
+        "CREATE INDEX IF NOT EXISTS idx_students_run ON students(run)",
+        "CREATE INDEX IF NOT EXISTS idx_students_email_lc ON students(lower(email))",
+        "CREATE INDEX IF NOT EXISTS idx_enrollments_year ON enrollments(year)",
+        "CREATE INDEX IF NOT EXISTS idx_enrollments_subject_year ON enrollments(subject_id, year)",
+        "CREATE INDEX IF NOT EXISTS idx_grades_assessment ON grades(assessment_id)",
+        "CREATE INDEX IF NOT EXISTS idx_assessments_subject_date ON assessments(subject_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_student_courses_course ON student_courses(course_id)",
+    ]),
+    (2, "Promedios por matrícula mantenidos por triggers", [
+        """CREATE TABLE IF NOT EXISTS enrollment_stats(
+            enrollment_id INTEGER PRIMARY KEY,
+            sum_wpct REAL NOT NULL DEFAULT 0.0,
+            sum_weight REAL NOT NULL DEFAULT 0.0,
+            n INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY(enrollment_id) REFERENCES enrollments(id) ON DELETE CASCADE
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_grades_stats_ins AFTER INSERT ON grades BEGIN
+            {_STATS_REFRESH_V2.format(where="e.id = NEW.enrollment_id")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_grades_stats_upd
+            AFTER UPDATE OF score, enrollment_id, assessment_id ON grades BEGIN
+            {_STATS_REFRESH_V2.format(where="e.id = NEW.enrollment_id")}
+            {_STATS_REFRESH_V2.format(where="e.id = OLD.enrollment_id AND OLD.enrollment_id <> NEW.enrollment_id")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_grades_stats_del AFTER DELETE ON grades BEGIN
+            {_STATS_REFRESH_V2.format(where="e.id = OLD.enrollment_id")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_assessments_stats_upd
+            AFTER UPDATE OF max_score, weight ON assessments BEGIN
+            {_STATS_REFRESH_V2.format(where="e.id IN (SELECT enrollment_id FROM grades WHERE assessment_id = NEW.id)")}
+        END""",
+        "DELETE FROM enrollment_stats",
+        _STATS_REFRESH_V2.format(where="e.id IN (SELECT enrollment_id FROM grades)"),
+    ]),
+    (3, "Búsqueda FTS5 de estudiantes e índice para listar evaluaciones", [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+            first_name, last_name, run, email,
+            content='students', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS trg_students_fts_ins AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts(rowid, first_name, last_name, run, email)
+            VALUES (NEW.id, NEW.first_name, NEW.last_name, NEW.run, NEW.email);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_students_fts_del AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, first_name, last_name, run, email)
+            VALUES ('delete', OLD.id, OLD.first_name, OLD.last_name, OLD.run, OLD.email);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_students_fts_upd AFTER UPDATE ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, first_name, last_name, run, email)
+            VALUES ('delete', OLD.id, OLD.first_name, OLD.last_name, OLD.run, OLD.email);
+            INSERT INTO students_fts(rowid, first_name, last_name, run, email)
+            VALUES (NEW.id, NEW.first_name, NEW.last_name, NEW.run, NEW.email);
+        END""",
+        "INSERT INTO students_fts(students_fts) VALUES ('rebuild')",
+        "CREATE INDEX IF NOT EXISTS idx_assessments_date ON assessments(COALESCE(date, ''))",
+    ]),
+    (4, "Puntos de control para importaciones por bloques", [
+        """CREATE TABLE IF NOT EXISTS import_checkpoints(
+            source_key TEXT PRIMARY KEY,
+            course_id INTEGER,
+            rows_done INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )""",
+    ]),
+    (5, "Registro de cambios para exportación incremental", [
+        """CREATE TABLE IF NOT EXISTS change_log(
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tbl TEXT NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('I','U','D')),
+    row_id INTEGER NOT NULL,
+    changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+)""",
+        *[_LOG_TRIGGER_V5.format(table=table, name=name, event=event, op=op, ref=ref)
+          for table in ("students", "enrollments", "assessments", "grades")
+          for name, event, op, ref in (("ins", "INSERT", "I", "NEW"),
+                                       ("upd", "UPDATE", "U", "NEW"),
+                                       ("del", "DELETE", "D", "OLD"))],
+    ]),
+    (6, "Años cerrados archivados en archivos aparte", [
+        """CREATE TABLE IF NOT EXISTS archived_years(
+            year INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            enrollments INTEGER NOT NULL,
+            assessments INTEGER NOT NULL,
+            grades INTEGER NOT NULL,
+            archived_at TEXT NOT NULL
+        )""",
+        # Un año archivado no admite matrículas nuevas en la base principal
+        """CREATE TRIGGER IF NOT EXISTS trg_enrollments_closed_ins BEFORE INSERT ON enrollments
+            WHEN EXISTS (SELECT 1 FROM archived_years WHERE year = NEW.year) BEGIN
+            SELECT RAISE(ABORT, 'Año cerrado: sus matrículas están archivadas');
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_enrollments_closed_upd BEFORE UPDATE OF year ON enrollments
+            WHEN EXISTS (SELECT 1 FROM archived_years WHERE year = NEW.year) BEGIN
+            SELECT RAISE(ABORT, 'Año cerrado: sus matrículas están archivadas');
+        END""",
+    ]),
+    (7, "Marca de change_log al cerrar cada año archivado", [
+        "ALTER TABLE archived_years ADD COLUMN log_seq INTEGER",
+        # El corte exacto de los años ya cerrados no quedó guardado: se usa la
+        # marca actual (sólo afecta a cambios hechos entre el cierre y esta migración)
+        "UPDATE archived_years SET log_seq = (SELECT COALESCE(MAX(seq), 0) FROM change_log)",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def current_version(conn):
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+def migrate(conn):
+    """Aplica las migraciones pendientes sobre `conn`. Retorna la versión final."""
+    version = current_version(conn)
+    for v, _desc, steps in MIGRATIONS:
+        if v <= version:
+            continue
+        for step in steps:
+            if callable(step):
+                step(conn)
+            else:
+                conn.execute(text(step))
+        # PRAGMA no acepta parámetros enlazados; v es siempre un int de MIGRATIONS
+        conn.execute(text(f"PRAGMA user_version = {int(v)}"))
+        version = v
+    return version
+
+# --- Consultas que emite la app (con parámetros de ejemplo) para EXPLAIN ---
+def app_queries():
+    """{nombre: (sql, parámetros)} con las mismas constantes SQL que usan los módulos.
+
+    Las del importador leen las tablas de staging: explain las crea antes (STAGING_SQL)."""
+    import analytics, gradebook, importer, reports, ui_catalog, ui_common, ui_grades, ui_reports
+    from db import YEARS_SQL
+    from paging import page_query
+    page = lambda sql, keys, cursor, params=None: page_query(sql, keys, params, cursor, limit=50)
+    match = {"m":'"ana"*'}
+    stg = {"n":"7°B", "y":2025, "cid":1, "c":"2025-01-01T00:00:00", "first":1}
+    return {
+        "estudiantes: página": page(ui_catalog.STUDENTS_SQL, ["id"], (1000,)),
+        "estudiantes: búsqueda": page(ui_catalog.STUDENTS_SEARCH_SQL, ["id"], None, match),
+        "asignaturas: página": page(ui_catalog.SUBJECTS_LIST_SQL, ["id"], (1000,)),
+        "asignaturas: selector": (ui_common.SUBJECTS_SQL, {}),
+        "estudiantes: selector": (ui_catalog.STUDENT_NAMES_SQL, {}),
+        "matrículas: página": page(ui_catalog.ENROLLMENTS_SQL, ui_catalog.ENROLLMENT_KEYS, (2025, 100000)),
+        "matrículas: búsqueda": page(ui_catalog.ENROLLMENTS_SEARCH_SQL, ui_catalog.ENROLLMENT_KEYS, None, match),
+        "evaluaciones: página": page(ui_catalog.ASSESSMENTS_SQL, ui_catalog.ASSESSMENT_KEYS, ("2025-12-31", 1000)),
+        "años": (YEARS_SQL, {}),
+        "notas: evaluaciones de asignatura": (ui_grades.ASSESSMENTS_SQL, {"s":1}),
+        "notas: carga en bloque": (ui_grades.SCORES_SQL, {"s":1, "y":2025, "a":1}),
+        "notas: libro": (gradebook.GRADEBOOK_SQL, {"s":1, "y":2025}),
+        "informes: cursos del año": (ui_reports.COURSES_SQL, {"y":2025}),
+        "informes: estudiantes del año": (ui_reports.STUDENTS_SQL, {"y":2025}),
+        "informes: promedios del estudiante": (reports.STUDENT_SQL, {"s":1, "y":2025}),
+        "informes: curso completo": (reports.COURSE_SQL.format(ids="1,2"), {"y":2025}),
+        "analítica: matrículas del año": (analytics.YEAR_SQL, {"y":2025}),
+        "importar: curso": (importer.COURSE_ID_SQL, stg),
+        "importar: asignaturas del curso": (importer.COURSE_SUBJECTS_SQL, stg),
+        "importar: resolver existentes": (importer.RESOLVE_SQL, {}),
+        "importar: deduplicar planilla": (importer.DEDUP_SQL, {}),
+        "importar: colapsar cadenas": (importer.COLLAPSE_SQL, {}),
+        "importar: crear estudiantes": (importer.INSERT_STUDENTS_SQL, stg),
+        "importar: asignar ids": (importer.ASSIGN_IDS_SQL, stg),
+        "importar: vincular curso": (importer.LINK_SQL, stg),
+        "importar: matricular": (importer.ENROLL_SQL, stg),
+    }
+
+def explain(conn, out=sys.stdout):
+    """Imprime el plan de consulta de cada entrada de app_queries().
+
+    Retorna las consultas que recorren una tabla completa (SCAN) dentro de una
+    subconsulta correlacionada: se repite por cada fila externa, es cuadrático."""
+    from importer import DROP_STAGING_SQL, STAGING_SQL
+    for sql in STAGING_SQL:
+        conn.execute(text(sql))
+    slow = []
+    for name, (sql, params) in app_queries().items():
+        rows = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params).fetchall()
+        print(f"== {name}", file=out)
+        depth, correlated = {0: 0}, {0: False}
+        for node_id, parent, _notused, detail in rows:
+            depth[node_id] = depth.get(parent, 0) + 1
+            correlated[node_id] = correlated.get(parent, False) or detail.startswith("CORRELATED")
+            mark = ""
+            if correlated[node_id] and detail.startswith("SCAN "):
+                slow.append(f"{name}: {detail}")
+                mark = "   <-- recorrido por cada fila"
+            print("  " * depth[node_id] + detail + mark, file=out)
+    for sql in DROP_STAGING_SQL:
+        conn.execute(text(sql))
+    return slow
+
+if __name__ == "__main__":
+    from db import engine, init_db
+    init_db()
+    with engine.begin() as conn:
+        if sys.argv[1:2] == ["explain"]:
+            slow = explain(conn)
+            if slow and "--check" in sys.argv:
+                sys.exit("Consultas cuadráticas:\n  " + "\n  ".join(slow))
+        else:
+            print(f"Esquema en versión {current_version(conn)}")
@@ -0,0 +1,48 @@
+# === Paginación por llave (keyset) y búsqueda de estudiantes ===
+# En vez de OFFSET, cada página continúa desde la llave de orden de la última
+# fila vista: WHERE (k1, k2) < (:k1, :k2) ORDER BY k1 DESC, k2 DESC LIMIT n.
+# Con un índice sobre la llave, el costo de una página no depende del tamaño
+# de la tabla ni de cuántos años de datos haya.
+import re
+from db import q
+
+def page_query(select_sql, keys, params=None, cursor=None, direction="next", limit=50):
+    """(SQL, parámetros) de una página de `select_sql` ordenada por `keys` (DESC).
+
+    Trae `limit` + 1 filas: la extra indica si hay más en esa dirección."""
+    params = dict(params or {})
+    cond = ""
+    if cursor is not None:
+        op = "<" if direction == "next" else ">"
+        # La cota redundante sobre la primera llave deja a SQLite usar índices de expresión
+        cond = (f"WHERE {keys[0]} {op}= :_k0 AND "
+                f"({', '.join(keys)}) {op} ({', '.join(f':_k{i}' for i in range(len(keys)))})")
+        params.update({f"_k{i}": v for i, v in enumerate(cursor)})
+    order = "DESC" if direction == "next" else "ASC"
+    params["_limit"] = int(limit) + 1
+    return (f"""SELECT * FROM ({select_sql}) AS page {cond}
+               ORDER BY {', '.join(f'{k} {order}' for k in keys)} LIMIT :_limit""", params)
+
+def fetch_page(select_sql, keys, params=None, cursor=None, direction="next", limit=50):
+    """Una página de `select_sql` ordenada por `keys` (columnas de salida, DESC).
+
+    `cursor` es la tupla de llaves de la fila límite (None = primera página).
+    direction="next" trae las filas posteriores al cursor; "prev" las anteriores.
+    Retorna (DataFrame, hay_más_en_esa_dirección)."""
+    df = q(*page_query(select_sql, keys, params, cursor, direction, limit))
+    more = len(df) > limit
+    df = df.iloc[:limit]
+    if direction == "prev":
+        df = df.iloc[::-1]
+    return df.reset_index(drop=True), more
+
+def row_key(df, keys, pos):
+    """Llave de orden de la fila `pos` (como tipos Python, para usar como parámetro)."""
+    return tuple(v.item() if hasattr(v, "item") else v for v in df.iloc[pos][list(keys)])
+
+def fts_query(text):
+    """Convierte texto libre en una consulta FTS5 segura: cada término como prefijo."""
+    terms = re.findall(r"\w+", text or "")
+    return " ".join(f'"{t}"*' for t in terms)
+
+STUDENT_MATCH = "SELECT rowid FROM students_fts WHERE students_fts MATCH :m"
@@ -0,0 +1,188 @@
+# === Informes por curso en lote ===
+# Una consulta trae los promedios (enrollment_stats) de todos los estudiantes de
+# los cursos pedidos; las notas se calculan en una pasada vectorizada y cada
+# informe (unas pocas filas) se arma con csv y una plantilla HTML, sin pandas.
+# Con más de una CPU los estudiantes se reparten en bloques a un pool de
+# procesos; los archivos se escriben al ZIP a medida que terminan, con una
+# ventana acotada de bloques en curso.
+#
+# Uso:  python reports.py --year 2025 [--course "7°B" ...] [--html] [--out informes.zip]
+import argparse, csv, html, io, multiprocessing, os, sys, tempfile, zipfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from db import q
+from grading import pct_to_chilean_array, round1, weighted_means
+
+COLUMNS = {"asignatura":"Asignatura", "prom_ponderado_%":"Promedio (%)", "nota_chilena":"Nota (1–7)"}
+
+def report_table(por_asignatura):
+    """Tabla del informe tal como se muestra y descarga."""
+    return por_asignatura[list(COLUMNS)].rename(columns=COLUMNS)
+
+# Promedios ponderados ya agregados por matrícula (ver stats.py)
+STUDENT_SQL = """
+    SELECT su.name AS asignatura, es.sum_wpct / es.sum_weight AS prom_ponderado
+    FROM enrollments e
+    JOIN enrollment_stats es ON es.enrollment_id=e.id
+    JOIN subjects su ON su.id=e.subject_id
+    WHERE e.student_id=:s AND e.year=:y AND es.n > 0 AND es.sum_weight <> 0
+    ORDER BY su.name ASC
+"""
+# {ids}: lista de ids de curso (enteros), armada por course_frame
+COURSE_SQL = """
+    SELECT c.name AS curso, st.id AS student_id, st.first_name||' '||st.last_name AS nombre,
+           su.name AS asignatura, es.sum_wpct / es.sum_weight AS prom_ponderado
+    FROM student_courses sc
+    JOIN courses c ON c.id=sc.course_id
+    JOIN students st ON st.id=sc.student_id
+    JOIN enrollments e ON e.student_id=sc.student_id AND e.year=:y
+    JOIN enrollment_stats es ON es.enrollment_id=e.id
+    JOIN subjects su ON su.id=e.subject_id
+    WHERE sc.course_id IN ({ids}) AND es.n > 0 AND es.sum_weight <> 0
+    ORDER BY c.name ASC, nombre ASC, st.id ASC, su.name ASC
+"""
+
+def student_report(student_id, year, scale):
+    """Promedio y nota por asignatura de un estudiante (informe individual)."""
+    min_note, pass_pct, max_note = scale
+    df = q(STUDENT_SQL, {"s":int(student_id), "y":int(year)}, year=year)
+    df["prom_ponderado_%"] = (df["prom_ponderado"] * 100).round(2)
+    df["nota_chilena"] = pct_to_chilean_array(df["prom_ponderado_%"].to_numpy(), min_note, pass_pct, max_note)
+    return df
+
+def course_frame(conn, year, course_ids, scale):
+    """Promedio y nota por (estudiante, asignatura) para los cursos dados, en una consulta."""
+    min_note, pass_pct, max_note = scale
+    ids = ",".join(str(int(c)) for c in course_ids) or "NULL"
+    res = conn.execute(text(COURSE_SQL.format(ids=ids)), {"y":int(year)})
+    df = pd.DataFrame(res.fetchall(), columns=list(res.keys()))
+    df["prom_ponderado_%"] = (df["prom_ponderado"] * 100).round(2)
+    df["nota_chilena"] = pct_to_chilean_array(df["prom_ponderado_%"].to_numpy(), min_note, pass_pct, max_note)
+    return df
+
+def _payloads(df, year, fmt):
+    """Un payload liviano (picklable) por estudiante, con su promedio general."""
+    if df.empty:
+        return
+    keys = df["curso"].astype(str) + "\x00" + df["student_id"].astype(str)
+    codes, uniq = pd.factorize(keys, sort=False)
+    general = round1(weighted_means(codes, df["nota_chilena"].to_numpy(), np.ones(len(df)), len(uniq)))
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(df)]
+    # Listas de tipos Python: el render no necesita pandas
+    curso, sid, nombre = df["curso"].tolist(), df["student_id"].tolist(), df["nombre"].tolist()
+    cols = [df[c].tolist() for c in COLUMNS]
+    for a, b in zip(starts.tolist(), ends.tolist()):
+        rows = list(zip(*(c[a:b] for c in cols)))
+        yield (curso[a], int(sid[a]), nombre[a], int(year), float(general[codes[a]]), rows, fmt)
+
+HTML_DOC = ("<!doctype html><html><head><meta charset='utf-8'><title>Informe {nombre}</title>"
+            "<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse}}"
+            "td,th{{border:1px solid #999;padding:4px 10px}}@media print{{body{{margin:0}}}}</style></head><body>"
+            "<h2>Informe {nombre} - {year}</h2><p>Curso: {curso}</p>"
+            "<p><b>Promedio general (nota): {general}</b></p>{table}</body></html>")
+
+def _html_table(rows):
+    cell = lambda tag, v: f"<{tag}>{html.escape(v)}</{tag}>"
+    head = "".join(cell("th", h) for h in COLUMNS.values())
+    # Decimales fijos por columna, como en la versión impresa anterior (to_html)
+    body = "".join(f"<tr>{cell('td', str(a))}{cell('td', f'{p:.2f}')}{cell('td', f'{n:.1f}')}</tr>"
+                   for a, p, n in rows)
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+def render_student(payload):
+    """Genera los archivos de un estudiante (csv y plantillas de texto, sin pandas:
+    cada informe tiene unas pocas filas y armar un DataFrame costaba más que el resto)."""
+    curso, sid, nombre, year, general, rows, fmt = payload
+    base = f"{curso}/informe_{sid}_{nombre.replace(' ','_')}_{year}"
+    buf = io.StringIO()
+    out = csv.writer(buf, lineterminator="\n")
+    out.writerow(COLUMNS.values())
+    out.writerows(rows)
+    files = [(base + ".csv", buf.getvalue().encode("utf-8"))]
+    if fmt == "html":
+        doc = HTML_DOC.format(nombre=html.escape(nombre), year=year, curso=html.escape(curso),
+                              general=general, table=_html_table(rows))
+        files.append((base + ".html", doc.encode("utf-8")))
+    return files
+
+def render_chunk(payloads):
+    """Archivos de varios estudiantes. Corre en un proceso del pool: una tarea por
+    bloque, así el envío entre procesos no pesa más que el render."""
+    return [render_student(p) for p in payloads]
+
+def _chunks(payloads, size):
+    chunk = []
+    for p in payloads:
+        chunk.append(p)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def write_zip(payloads, dest, workers=None, chunk=200, window=4):
+    """Escribe los informes en el ZIP `dest` (ruta o archivo). Retorna cuántos estudiantes.
+
+    Con una sola CPU (o workers=1) se genera en el mismo proceso."""
+    workers = min(workers or os.cpu_count() or 1, os.cpu_count() or 1)
+    count = 0
+    with zipfile.ZipFile(dest, "w", zipfile.ZIP_DEFLATED) as zf:
+        def add(files_by_student):
+            nonlocal count
+            for files in files_by_student:
+                for name, data in files:
+                    zf.writestr(name, data)
+                count += 1
+        if workers <= 1:
+            add(map(render_student, payloads))
+            return count
+        # forkserver y no fork: dentro del servidor de Streamlit (con el hilo escritor)
+        # un hijo de fork puede heredar un candado tomado y quedar bloqueado
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+            pending = []
+            for part in _chunks(payloads, chunk):
+                pending.append(pool.submit(render_chunk, part))
+                if len(pending) >= workers * window:
+                    add(pending.pop(0).result())
+            for fut in pending:
+                add(fut.result())
+    return count
+
+def build_course_zip(conn, year, course_ids, scale, fmt="csv", workers=None, dest=None):
+    """Genera el ZIP de informes de los cursos. Retorna (ruta, n_estudiantes)."""
+    if dest is None:
+        fd, dest = tempfile.mkstemp(prefix="informes_", suffix=".zip")
+        os.close(fd)
+    df = course_frame(conn, year, course_ids, scale)
+    # Menos de un par de bloques no justifica levantar procesos
+    if workers is None and df["student_id"].nunique() < 400:
+        workers = 1
+    n = write_zip(_payloads(df, year, fmt), dest, workers=workers)
+    return dest, n
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Informes por curso en lote (ZIP).")
+    ap.add_argument("--year", type=int, required=True)
+    ap.add_argument("--course", action="append", help="Nombre del curso (repetible). Por defecto, todos los del año.")
+    ap.add_argument("--html", action="store_true", help="Incluir versión imprimible (HTML).")
+    ap.add_argument("--out", default="informes.zip")
+    ap.add_argument("--workers", type=int)
+    ap.add_argument("--min-note", type=float, default=1.0)
+    ap.add_argument("--pass-pct", type=int, default=60)
+    ap.add_argument("--max-note", type=float, default=7.0)
+    args = ap.parse_args()
+
+    from db import init_db, read_conn
+    init_db()
+    with read_conn(args.year) as conn:
+        courses = conn.execute(text("SELECT id, name FROM courses WHERE year=:y ORDER BY name"),
+                               {"y":args.year}).fetchall()
+        ids = [cid for cid, name in courses if not args.course or name in args.course]
+        if not ids:
+            sys.exit("No hay cursos que coincidan para ese año.")
+        _, n = build_course_zip(conn, args.year, ids, (args.min_note, args.pass_pct, args.max_note),
+                                fmt="html" if args.html else "csv", workers=args.workers, dest=args.out)
+    print(f"{n} informes escritos en {args.out}")
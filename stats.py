@@ -0,0 +1,69 @@
+# === Promedios por matrícula (tabla derivada enrollment_stats) ===
+# enrollment_stats guarda, por matrícula, la suma de pct×ponderación, la suma de
+# ponderaciones y la cantidad de notas. Los triggers de la migración 2
+# (migrations.py) la recalculan para la matrícula afectada en cada cambio de
+# grades/assessments, así un informe es una búsqueda por índice.
+# Sólo cuentan notas con score no nulo en evaluaciones con max_score distinto de 0.
+# La migración 2 guarda su propia copia del SQL: si el cálculo cambia aquí, los
+# triggers se reemplazan con una migración nueva que use refresh_sql.
+#
+# Uso:  python stats.py verify    -> recalcula desde cero y compara con la tabla
+#       python stats.py rebuild   -> reemplaza la tabla con el recálculo
+import sys
+from sqlalchemy import text
+
+# Agregado de una o varias matrículas; {where} filtra sobre `e`.
+AGGREGATE_SQL = """
+    SELECT e.id AS enrollment_id,
+           COALESCE(SUM(g.score / a.max_score * a.weight), 0.0) AS sum_wpct,
+           COALESCE(SUM(a.weight), 0.0) AS sum_weight,
+           COUNT(a.id) AS n
+    FROM enrollments e
+    LEFT JOIN grades g ON g.enrollment_id = e.id AND g.score IS NOT NULL
+    LEFT JOIN assessments a ON a.id = g.assessment_id AND a.max_score <> 0
+    WHERE {where}
+    GROUP BY e.id
+"""
+
+UPSERT_SQL = """
+    INSERT INTO enrollment_stats(enrollment_id, sum_wpct, sum_weight, n)
+    {select}
+    ON CONFLICT(enrollment_id) DO UPDATE SET
+        sum_wpct = excluded.sum_wpct, sum_weight = excluded.sum_weight, n = excluded.n;
+"""
+
+def refresh_sql(where):
+    """Sentencia que recalcula las matrículas que cumplen `where` (usada por los triggers)."""
+    return UPSERT_SQL.format(select=AGGREGATE_SQL.format(where=where))
+
+def rebuild(conn):
+    conn.execute(text("DELETE FROM enrollment_stats"))
+    conn.execute(text(refresh_sql("e.id IN (SELECT enrollment_id FROM grades)")))
+
+def verify(conn, tol=1e-9):
+    """Compara la tabla mantenida con un recálculo completo. Retorna las diferencias."""
+    fresh = {r.enrollment_id: (r.sum_wpct, r.sum_weight, r.n)
+             for r in conn.execute(text(AGGREGATE_SQL.format(where="1")))}
+    kept = {r.enrollment_id: (r.sum_wpct, r.sum_weight, r.n)
+            for r in conn.execute(text("SELECT enrollment_id, sum_wpct, sum_weight, n FROM enrollment_stats"))}
+    diffs = []
+    for eid in sorted(fresh.keys() | kept.keys()):
+        want = fresh.get(eid, (0.0, 0.0, 0))
+        got = kept.get(eid, (0.0, 0.0, 0))
+        if want[2] != got[2] or any(abs(w - g) > tol for w, g in zip(want[:2], got[:2])):
+            diffs.append({"enrollment_id":eid, "esperado":want, "tabla":got})
+    return diffs
+
+if __name__ == "__main__":
+    from db import init_db, transaction
+    init_db()
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    with transaction() as conn:
+        if cmd == "rebuild":
+            rebuild(conn)
+            print("enrollment_stats reconstruida.")
+        diffs = verify(conn)
+    for d in diffs[:50]:
+        print(d)
+    print(f"{len(diffs)} diferencias.")
+    sys.exit(1 if diffs else 0)
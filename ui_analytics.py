@@ -0,0 +1,53 @@
+# === Página Analítica (cursos y colegio, ver analytics.py) ===
+import streamlit as st
+from db import all_years
+from analytics import year_summary
+from ui_common import get_scale
+
+def ui_analytics():
+    st.header("Analítica")
+    scale = get_scale()
+    years = all_years()
+    if not years:
+        st.info("Registra matrículas primero.")
+        return
+    yr = st.selectbox("Año", years)
+    with st.spinner("Calculando estadísticas del año..."):
+        summary = year_summary(int(yr), scale)
+    school = summary["colegio"]
+    if not school["matrículas"]:
+        st.info("Aún no hay notas registradas ese año.")
+        return
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Estudiantes", school["estudiantes"])
+    c2.metric("Nota media", school["media"])
+    c3.metric("Reprobación (< 4.0)", f"{school['reprobación_%']}%")
+    c4.metric("Con alguna asignatura reprobada", school["en_riesgo"])
+
+    t_sub, t_course, t_cell, t_rank = st.tabs(["Por asignatura", "Por curso", "Curso × asignatura", "Ranking"])
+    with t_sub:
+        by_subject = summary["por_asignatura"]
+        st.dataframe(by_subject, hide_index=True, use_container_width=True)
+        st.bar_chart(by_subject.set_index("asignatura")["reprobación_%"])
+    with t_course:
+        st.dataframe(summary["por_curso"], hide_index=True, use_container_width=True)
+    with t_cell:
+        cells = summary["curso_asignatura"]
+        sel = st.multiselect("Cursos", summary["por_curso"]["curso"], key="analytics_courses")
+        if sel:
+            cells = cells[cells["curso"].isin(sel)]
+        st.dataframe(cells, hide_index=True, use_container_width=True)
+    with t_rank:
+        rank = summary["ranking"]
+        course = st.selectbox("Curso", ["(todos)"] + list(summary["por_curso"]["curso"]), key="analytics_rank_course")
+        if course != "(todos)":
+            rank = rank[rank["curso"] == course]
+        n = st.number_input("Mostrar", 10, 500, 50, 10)
+        col_top, col_risk = st.columns(2)
+        with col_top:
+            st.write("Mejores promedios")
+            st.dataframe(rank.head(int(n)), hide_index=True, use_container_width=True)
+        with col_risk:
+            st.write("Más asignaturas reprobadas")
+            risk = rank[rank["reprobadas"] > 0].sort_values(["reprobadas", "promedio"], ascending=[False, True])
+            st.dataframe(risk.head(int(n)), hide_index=True, use_container_width=True)
@@ -0,0 +1,164 @@
+# === Páginas de mantención: estudiantes, asignaturas, matrículas y evaluaciones ===
+import streamlit as st
+from datetime import datetime, date
+from db import exec_sql, q
+from paging import STUDENT_MATCH, fts_query
+from ui_common import SUBJECTS_SQL, paged_table
+
+# Listados paginados (paging.py) y selectores; migrations.py explain los revisa
+STUDENTS_SQL = "SELECT * FROM students"
+STUDENTS_SEARCH_SQL = f"SELECT * FROM students WHERE id IN ({STUDENT_MATCH})"
+SUBJECTS_LIST_SQL = "SELECT * FROM subjects"
+STUDENT_NAMES_SQL = "SELECT id, first_name||' '||last_name AS name FROM students ORDER BY name ASC"
+ENROLLMENTS_SQL = """
+    SELECT e.id, (st.first_name||' '||st.last_name) AS estudiante,
+           su.name AS asignatura, e.year
+    FROM enrollments e
+    JOIN students st ON st.id=e.student_id
+    JOIN subjects su ON su.id=e.subject_id
+"""
+ENROLLMENTS_SEARCH_SQL = ENROLLMENTS_SQL + f" WHERE e.student_id IN ({STUDENT_MATCH})"
+ENROLLMENT_KEYS = ["year","id"]
+ASSESSMENTS_SQL = """
+    SELECT a.id, su.name AS asignatura, a.title, a.date, a.max_score, a.weight,
+           COALESCE(a.date, '') AS fecha_orden
+    FROM assessments a JOIN subjects su ON su.id=a.subject_id
+"""
+ASSESSMENT_KEYS = ["fecha_orden","id"]
+
+def ui_students():
+    st.header("Estudiantes")
+    with st.expander("Agregar / Editar / Eliminar", expanded=True):
+        c1,c2,c3 = st.columns(3)
+        with c1:
+            run = st.text_input("RUN/RUT (opcional)")
+            fn = st.text_input("Nombre *")
+            ln = st.text_input("Apellido *")
+        with c2:
+            email = st.text_input("Email")
+            mode = st.radio("Acción", ["Crear","Actualizar","Eliminar"], horizontal=True)
+        with c3:
+            sid = st.number_input("ID estudiante (Actualizar/Eliminar)", min_value=0, step=1)
+
+        if st.button("Guardar estudiante"):
+            if mode=="Crear":
+                exec_sql("""INSERT INTO students(run,first_name,last_name,email,created_at)
+                            VALUES(:r,:f,:l,:e,:c)""",
+                         {"r":run or None, "f":fn, "l":ln, "e":email or None, "c":datetime.utcnow().isoformat()})
+                st.success("Creado.")
+            elif mode=="Actualizar":
+                exec_sql("""UPDATE students SET run=:r, first_name=:f, last_name=:l, email=:e WHERE id=:id""",
+                         {"r":run or None, "f":fn, "l":ln, "e":email or None, "id":int(sid)})
+                st.success("Actualizado.")
+            else:
+                exec_sql("DELETE FROM students WHERE id=:id", {"id":int(sid)})
+                st.warning("Eliminado, junto con sus matrículas, notas y cursos.")
+    search = st.text_input("Buscar (nombre, RUN o email)", key="students_search")
+    match = fts_query(search)
+    if match:
+        paged_table("students", STUDENTS_SEARCH_SQL, ["id"], {"m":match})
+    else:
+        paged_table("students", STUDENTS_SQL, ["id"])
+
+def ui_subjects():
+    st.header("Asignaturas")
+    with st.expander("Agregar / Editar / Eliminar", expanded=True):
+        c1,c2,c3 = st.columns(3)
+        with c1:
+            code = st.text_input("Código *", placeholder="MAT7B")
+            name = st.text_input("Nombre *", placeholder="Matemática")
+        with c2:
+            mode = st.radio("Acción", ["Crear","Actualizar","Eliminar"], horizontal=True)
+        with c3:
+            subj_id = st.number_input("ID asignatura (Actualizar/Eliminar)", min_value=0, step=1)
+
+        if st.button("Guardar asignatura"):
+            if mode=="Crear":
+                exec_sql("INSERT INTO subjects(code,name) VALUES(:c,:n)", {"c":code, "n":name})
+                st.success("Creada.")
+            elif mode=="Actualizar":
+                exec_sql("UPDATE subjects SET code=:c, name=:n WHERE id=:id",
+                         {"c":code, "n":name, "id":int(subj_id)})
+                st.success("Actualizada.")
+            else:
+                exec_sql("DELETE FROM subjects WHERE id=:id", {"id":int(subj_id)})
+                st.warning("Eliminada, junto con sus matrículas, evaluaciones y notas.")
+    paged_table("subjects", SUBJECTS_LIST_SQL, ["id"])
+
+def ui_enrollments():
+    st.header("Matrículas (Alumno ↔ Asignatura ↔ Año)")
+    students = q(STUDENT_NAMES_SQL, columnar=True)
+    subjects = q(SUBJECTS_SQL)
+    if students.empty or subjects.empty:
+        st.info("Crea al menos un estudiante y una asignatura.")
+        return
+
+    with st.expander("Matricular / Desmatricular", expanded=True):
+        c1,c2,c3 = st.columns(3)
+        with c1:
+            s_name = st.selectbox("Estudiante", students["name"])
+            s_id = int(students.loc[students["name"]==s_name, "id"].iloc[0])
+        with c2:
+            sub_name = st.selectbox("Asignatura", subjects["name"])
+            sub_id = int(subjects.loc[subjects["name"]==sub_name, "id"].iloc[0])
+        with c3:
+            yr = st.number_input("Año", min_value=2000, max_value=2100, value=date.today().year, step=1)
+        c1_,c2_ = st.columns(2)
+        with c1_:
+            if st.button("Matricular"):
+                try:
+                    exec_sql("""INSERT INTO enrollments(student_id,subject_id,year)
+                                VALUES(:s,:u,:y)""", {"s":s_id, "u":sub_id, "y":int(yr)})
+                    st.success("Matriculado.")
+                except Exception as e:
+                    st.error(f"No se pudo matricular: {e}")
+        with c2_:
+            if st.button("Desmatricular"):
+                exec_sql("""DELETE FROM enrollments WHERE student_id=:s AND subject_id=:u AND year=:y""",
+                         {"s":s_id, "u":sub_id, "y":int(yr)})
+                st.warning("Desmatriculado.")
+
+    st.subheader("Matrículas")
+    search = st.text_input("Buscar estudiante (nombre, RUN o email)", key="enrollments_search")
+    match = fts_query(search)
+    if match:
+        paged_table("enrollments", ENROLLMENTS_SEARCH_SQL, ENROLLMENT_KEYS, {"m":match})
+    else:
+        paged_table("enrollments", ENROLLMENTS_SQL, ENROLLMENT_KEYS)
+
+def ui_assessments():
+    st.header("Evaluaciones")
+    subjects = q(SUBJECTS_SQL)
+    if subjects.empty:
+        st.info("Crea asignaturas primero.")
+        return
+    with st.expander("Crear / Editar / Eliminar", expanded=True):
+        c1,c2,c3 = st.columns(3)
+        with c1:
+            sub_name = st.selectbox("Asignatura", subjects["name"])
+            sub_id = int(subjects.loc[subjects["name"]==sub_name, "id"].iloc[0])
+            title = st.text_input("Título *", placeholder="Prueba 1")
+        with c2:
+            dt = st.date_input("Fecha", value=date.today())
+            max_score = st.number_input("Puntaje máximo", value=100.0)
+        with c3:
+            weight = st.number_input("Ponderación", value=1.0, step=0.1)
+            mode = st.radio("Acción", ["Crear","Actualizar","Eliminar"], horizontal=True)
+            aid = st.number_input("ID evaluación (Actualizar/Eliminar)", min_value=0, step=1)
+
+        if st.button("Guardar evaluación"):
+            if mode=="Crear":
+                exec_sql("""INSERT INTO assessments(subject_id,title,date,max_score,weight)
+                            VALUES(:s,:t,:d,:m,:w)""",
+                         {"s":sub_id, "t":title, "d":str(dt), "m":float(max_score), "w":float(weight)})
+                st.success("Creada.")
+            elif mode=="Actualizar":
+                exec_sql("""UPDATE assessments SET subject_id=:s, title=:t, date=:d, max_score=:m, weight=:w
+                            WHERE id=:id""",
+                         {"s":sub_id, "t":title, "d":str(dt), "m":float(max_score), "w":float(weight), "id":int(aid)})
+                st.success("Actualizada.")
+            else:
+                exec_sql("DELETE FROM assessments WHERE id=:id", {"id":int(aid)})
+                st.warning("Eliminada, junto con sus notas.")
+
+    paged_table("assessments", ASSESSMENTS_SQL, ASSESSMENT_KEYS, hide=["fecha_orden"])
@@ -0,0 +1,43 @@
+# === Piezas comunes de las páginas de la app ===
+import streamlit as st
+from paging import fetch_page, row_key
+
+SUBJECTS_SQL = "SELECT id, name FROM subjects ORDER BY name ASC"
+
+# --- Escala chilena desde la barra lateral ---
+def get_scale():
+    min_note = st.sidebar.number_input("Nota mínima", 1.0, 7.0, 1.0, 0.1)
+    pass_pct = st.sidebar.number_input("Porcentaje para 4.0", 1, 99, 60, 1)
+    max_note = st.sidebar.number_input("Nota máxima", min_note, 7.0, 7.0, 0.1)
+    return min_note, pass_pct, max_note
+
+# --- Listados paginados (keyset, ver paging.py) ---
+def paged_table(key, select_sql, keys, params=None, hide=()):
+    c1, c2, c3, c4 = st.columns([1,1,1,3])
+    with c4:
+        size = st.selectbox("Filas por página", [25,50,100,200], index=1, key=f"{key}_size")
+    sig = (select_sql, tuple(sorted((params or {}).items())), size)
+    state = st.session_state.get(f"{key}_page")
+    if not state or state["sig"] != sig:
+        state = st.session_state[f"{key}_page"] = {"sig":sig, "cursor":None, "dir":"next"}
+
+    df, more = fetch_page(select_sql, keys, params, state["cursor"], state["dir"], size)
+    if state["dir"] == "prev" and not more:
+        # Se llegó al inicio: mostrar la primera página completa
+        state.update(cursor=None, dir="next")
+        df, more = fetch_page(select_sql, keys, params, None, "next", size)
+    at_start = state["cursor"] is None
+    at_end = state["dir"] == "next" and not more
+
+    def go(cursor, direction):
+        state.update(cursor=cursor, dir=direction)
+
+    with c1:
+        st.button("◀ Anterior", key=f"{key}_prev", disabled=at_start or df.empty,
+                  on_click=go, args=(row_key(df, keys, 0) if not df.empty else None, "prev"))
+    with c2:
+        st.button("Siguiente ▶", key=f"{key}_next", disabled=at_end or df.empty,
+                  on_click=go, args=(row_key(df, keys, -1) if not df.empty else None, "next"))
+    with c3:
+        st.button("Inicio", key=f"{key}_first", disabled=at_start, on_click=go, args=(None, "next"))
+    st.dataframe(df.drop(columns=list(hide)), use_container_width=True)
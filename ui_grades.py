@@ -0,0 +1,96 @@
+# === Página Notas: ingreso en bloque y libro de notas ===
+import streamlit as st
+import pandas as pd
+from sqlalchemy import text
+from db import q, all_years, archived_years, write, write_scope
+import gradebook
+from ui_common import SUBJECTS_SQL, get_scale
+
+# Una sola consulta: todos los matriculados con su nota actual (o vacía)
+SCORES_SQL = """
+    SELECT e.id AS enrollment_id, st.first_name||' '||st.last_name AS estudiante, g.score
+    FROM enrollments e
+    JOIN students st ON st.id=e.student_id
+    LEFT JOIN grades g ON g.enrollment_id=e.id AND g.assessment_id=:a
+    WHERE e.subject_id=:s AND e.year=:y
+    ORDER BY estudiante ASC
+"""
+ASSESSMENTS_SQL = "SELECT id, title, max_score FROM assessments WHERE subject_id=:s ORDER BY date ASC"
+
+# --- Notas en bloque ---
+def load_scores(sub_id, yr, aid):
+    return q(SCORES_SQL, {"s":sub_id, "y":yr, "a":aid}, year=yr)
+
+def save_scores(sub_id, aid, before, after):
+    """Escribe sólo las celdas modificadas en una transacción; una celda vaciada
+    borra la nota. Retorna filas cambiadas."""
+    old = pd.to_numeric(before["score"], errors="coerce")
+    new = pd.to_numeric(after["score"], errors="coerce")
+    mask = new.notna() & (old.isna() | (old != new))
+    rows = [{"e":int(e), "a":int(aid), "s":float(sc)}
+            for e, sc in zip(after.loc[mask, "enrollment_id"], new[mask])]
+    cleared = [{"e":int(e), "a":int(aid)} for e in after.loc[old.notna() & new.isna(), "enrollment_id"]]
+    if not rows and not cleared:
+        return 0
+    def upsert(conn):
+        # Sólo cambian notas de esta asignatura: los libros de otras siguen en caché
+        write_scope(conn, "grades", int(sub_id))
+        if rows:
+            conn.execute(text("""INSERT INTO grades(enrollment_id,assessment_id,score)
+                                 VALUES(:e,:a,:s)
+                                 ON CONFLICT(enrollment_id,assessment_id) DO UPDATE SET score=excluded.score"""),
+                         rows)
+        if cleared:
+            conn.execute(text("DELETE FROM grades WHERE enrollment_id=:e AND assessment_id=:a"), cleared)
+    write(upsert)
+    return len(rows) + len(cleared)
+
+def ui_grades():
+    st.header("Notas")
+    years = all_years()
+    subjects = q(SUBJECTS_SQL)
+    if not years or subjects.empty:
+        st.info("Asegúrate de tener matrículas y asignaturas.")
+        return
+    yr = st.selectbox("Año", years)
+    closed = int(yr) in archived_years()
+    sub_name = st.selectbox("Asignatura", subjects["name"])
+    sub_id = int(subjects.loc[subjects["name"]==sub_name,"id"].iloc[0])
+
+    assessments = q(ASSESSMENTS_SQL, {"s":sub_id}, year=int(yr))
+    if assessments.empty:
+        st.info("Crea evaluaciones para esta asignatura.")
+        return
+    assess_title = st.selectbox("Evaluación", assessments["title"])
+    aid = int(assessments.loc[assessments["title"]==assess_title,"id"].iloc[0])
+    max_sc = float(assessments.loc[assessments["title"]==assess_title,"max_score"].iloc[0])
+
+    scores = load_scores(sub_id, int(yr), aid)
+    if scores.empty:
+        st.info("No hay estudiantes matriculados en esta asignatura/año.")
+        return
+
+    if closed:
+        st.info(f"El año {yr} está cerrado (archivado): sus notas son de sólo lectura.")
+    else:
+        st.write(f"Ingrese notas (0–{max_sc}):")
+    edited = st.data_editor(
+        scores, hide_index=True, use_container_width=True,
+        disabled=True if closed else ["enrollment_id","estudiante"],
+        column_config={
+            "enrollment_id": None,
+            "estudiante": st.column_config.TextColumn("Estudiante"),
+            "score": st.column_config.NumberColumn("Nota", min_value=0.0, max_value=max_sc, step=0.1),
+        },
+        key=f"grades_{sub_id}_{yr}_{aid}",
+    )
+    if not closed and st.button("Guardar notas"):
+        changed = save_scores(sub_id, aid, scores, edited)
+        st.success(f"Guardado. Filas modificadas: {changed}.")
+
+    st.subheader("Libro de notas (todas las evaluaciones)")
+    book = gradebook.load(sub_id, int(yr))
+    if not book.shape[1]:
+        st.info("Aún no hay notas registradas en esta asignatura/año.")
+        return
+    st.dataframe(book.frame(get_scale()), hide_index=True, use_container_width=True)
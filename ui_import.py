@@ -0,0 +1,144 @@
+# === Página Importar (planillas de uno o varios cursos) ===
+# Es la página de inicio: no importa pandas, openpyxl ni el importador al
+# mostrarse, sólo al procesar un archivo o descargar la plantilla.
+import streamlit as st
+import io
+from datetime import date
+from functools import lru_cache
+from db import write
+
+TEMPLATE = {
+    "estudiantes": [["run","first_name","last_name","email"],
+                    ["11111111-1","Ana","Pérez","ana@example.com"],
+                    ["22222222-2","Luis","Gómez","luis@example.com"]],
+    "asignaturas": [["code","name"], ["MAT","Matemática"], ["LEN","Lenguaje"], ["HIS","Historia"]],
+}
+
+@lru_cache(maxsize=1)
+def template_bytes():
+    """La plantilla .xlsx; se arma una vez por proceso, al descargarla por primera vez."""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+    wb = Workbook()
+    wb.remove(wb.active)
+    for sheet, rows in TEMPLATE.items():
+        ws = wb.create_sheet(sheet)
+        for row in rows:
+            ws.append(row)
+        for cell in ws[1]:
+            cell.font = Font(bold=True)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+def ui_import():
+    st.header("Importar planilla Excel → Curso + Matrículas + Asignaturas")
+    st.write("La planilla debe tener **dos hojas**: `estudiantes` y `asignaturas`.")
+    with st.expander("Descargar plantilla", expanded=False):
+        # Se genera al hacer clic (y queda en caché), no en cada vista de la página
+        st.download_button("Descargar plantilla.xlsx", data=template_bytes,
+                           file_name="plantilla_importacion.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+    mode = st.radio("Modo", ["Un curso", "Un curso por bloques", "Varios cursos"], horizontal=True,
+                    help="Por bloques: lee el archivo fila a fila y confirma cada bloque (reanudable; acepta CSV). "
+                         "Varios cursos: un libro con una hoja por curso más la hoja `asignaturas`, "
+                         "o un ZIP de planillas de un curso (nombre del archivo = curso).")
+    col_a, col_b = st.columns(2)
+    with col_a:
+        if mode != "Varios cursos":
+            course_name = st.text_input("Nombre del curso", value="7°B")
+        year = st.number_input("Año", min_value=2000, max_value=2100, value=date.today().year, step=1)
+    with col_b:
+        if mode == "Varios cursos":
+            st.caption("Hoja por curso con columnas first_name, last_name (opcional: run, email). "
+                       "En `asignaturas`, la columna opcional `curso` limita la asignatura a ese curso.")
+    if mode == "Un curso por bloques":
+        file = st.file_uploader("Sube el archivo .xlsx o .csv de estudiantes", type=["xlsx","csv"])
+        subjects_file = st.file_uploader("Asignaturas (.csv, sólo si el archivo anterior es CSV; "
+                                         "si no se sube, se usan las del curso)", type=["csv"])
+    elif mode == "Varios cursos":
+        file = st.file_uploader("Sube el libro .xlsx o el .zip de planillas", type=["xlsx","zip"])
+    else:
+        file = st.file_uploader("Sube el archivo .xlsx", type=["xlsx"])
+
+    if st.button("Procesar importación") and file:
+        if mode == "Un curso por bloques":
+            ui_import_stream(course_name, int(year), file, subjects_file)
+            return
+        if mode == "Varios cursos":
+            ui_import_many(int(year), file)
+            return
+        import pandas as pd
+        from importer import import_course, read_workbook
+        try:
+            df_students, df_subjects = read_workbook(file)
+        except Exception as e:
+            st.error(f"No se pudo leer el Excel: {e}")
+            return
+
+        # Validaciones básicas
+        need_s_cols = {"first_name","last_name"}
+        if not need_s_cols.issubset(set(map(str.lower, df_students.columns))):
+            st.error("Hoja 'estudiantes' debe tener columnas al menos: first_name, last_name (opcional: run, email).")
+            return
+        need_sub_cols = {"code","name"}
+        if not need_sub_cols.issubset(set(map(str.lower, df_subjects.columns))):
+            st.error("Hoja 'asignaturas' debe tener columnas: code, name.")
+            return
+
+        result = write(lambda conn: import_course(conn, course_name, int(year), df_students, df_subjects),
+                       exclusive=True)
+        created_students = result["created_students"]
+        created_subjects = result["created_subjects"]
+
+        st.success(f"Importación completada. Estudiantes nuevos: {created_students}. Asignaturas procesadas: {created_subjects}.")
+        st.info(f"Curso: {course_name} — Año: {year}. Todos los estudiantes quedaron matriculados en las asignaturas del curso.")
+        st.dataframe(pd.DataFrame(result["phases"]), use_container_width=True)
+
+def ui_import_stream(course_name, year, file, subjects_file):
+    import pandas as pd
+    from importer import import_file_stream
+    bar = st.progress(0.0, text="Procesando...")
+
+    def progress(done, total):
+        frac = min(done / total, 1.0) if total else 0.0
+        bar.progress(frac, text=f"{done} de {total or '?'} filas procesadas")
+
+    try:
+        result = import_file_stream(write, course_name, year, file, subjects_file, progress=progress)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    except Exception as e:
+        st.error(f"No se pudo completar la importación: {e}. "
+                 "Vuelva a subir el mismo archivo para reanudar desde el último bloque confirmado.")
+        return
+    bar.progress(1.0, text="Listo.")
+    if result["resumed_from"]:
+        st.info(f"Se reanudó desde la fila {result['resumed_from']}.")
+    st.success(f"Importación completada. Estudiantes nuevos: {result['created_students']}. "
+               f"Filas procesadas: {result['rows']} en {result['chunks']} bloques. "
+               f"Filas descartadas (sin nombre/apellido): {result['rejected']}.")
+    st.dataframe(pd.DataFrame(result["phases"]), use_container_width=True)
+
+def ui_import_many(year, file):
+    import pandas as pd
+    from batch_import import import_many
+    bar = st.progress(0.0, text="Leyendo cursos...")
+
+    def progress(done, total):
+        bar.progress(done / total, text=f"{done} de {total} cursos procesados")
+
+    try:
+        results = import_many(write, file, year, progress=progress)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if not results:
+        st.warning("No se encontraron cursos en el archivo.")
+        return
+    df = pd.DataFrame(results)
+    ok = int((df["estado"] == "ok").sum())
+    (st.success if ok == len(df) else st.warning)(
+        f"{ok} de {len(df)} cursos importados para {year}. Estudiantes nuevos: {int(df['nuevos'].sum())}.")
+    st.dataframe(df, use_container_width=True)
@@ -0,0 +1,67 @@
+# === Página Rendimiento (administración) ===
+import streamlit as st
+import pandas as pd
+from datetime import date
+from db import query_cache, all_years, archived_years, writes
+import archive
+from instrument import BUCKETS_MS, metrics
+
+def ui_metrics():
+    st.header("Rendimiento")
+    cs = query_cache.stats()
+    st.write(f"Caché de consultas: {cs['hits']} aciertos, {cs['misses']} fallos, "
+             f"tasa {cs['hit_rate']:.0%}, {cs['entries']} entradas.")
+
+    st.subheader("Escrituras (cola única)")
+    ws = writes.stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("En cola", ws["cola"], help=f"Máximo observado: {ws['cola_max']}")
+    c2.metric("Commits", ws["commits"], help=f"{ws['trabajos']} trabajos, {ws['fallidos']} fallidos")
+    c3.metric("Trabajos por commit", ws["por_commit"])
+    c4.metric("Commit p95 (ms)", ws["commit"]["p95_ms"])
+    st.dataframe(pd.DataFrame({"commit":ws["commit"], "espera en cola":ws["espera"]}).T[
+        ["n","p50_ms","p95_ms","max_ms"]], use_container_width=True)
+
+    st.subheader("Años archivados")
+    st.caption("Un año cerrado se mueve a su propio archivo: la base principal queda chica y "
+               "el año se sigue consultando en Notas, Informes y Analítica (sólo lectura).")
+    archived = archive.listing()
+    if not archived.empty:
+        st.dataframe(archived, hide_index=True, use_container_width=True)
+    open_years = [y for y in all_years() if y < date.today().year and y not in archived_years()]
+    if open_years:
+        c1, c2 = st.columns([1, 3])
+        with c1:
+            to_close = st.selectbox("Año a cerrar", open_years)
+        with c2:
+            st.write("")
+            if st.button(f"Archivar {to_close}"):
+                with st.spinner("Archivando..."):
+                    try:
+                        r = archive.close_year(to_close)
+                        st.success(f"{to_close} archivado: {r['enrollments']} matrículas, {r['grades']} notas "
+                                   f"({r['archivo_mb']} MB) en {r['copia_s'] + r['cierre_s']:.1f}s.")
+                    except archive.ArchiveError as e:
+                        st.error(f"No se archivó: {e}")
+
+    st.subheader("Páginas")
+    pages = metrics.page_summary()
+    if pages:
+        st.dataframe(pd.DataFrame.from_dict(pages, orient="index")[
+            ["n","p50_ms","p95_ms","max_ms","sentencias_ultima","sentencias_prom"]], use_container_width=True)
+    else:
+        st.info("Aún no hay mediciones de páginas.")
+
+    st.subheader("Consultas más lentas")
+    by = st.radio("Ordenar por", ["p95_ms","max_ms","total_ms","n"], horizontal=True)
+    slow = metrics.slowest(limit=30, by=by)
+    if slow:
+        df = pd.DataFrame(slow)[["sql","n","p50_ms","p95_ms","max_ms","total_ms","rows"]]
+        st.dataframe(df, use_container_width=True)
+        shape = st.selectbox("Histograma de", df["sql"])
+        buckets = metrics.histogram(shape)
+        labels = [f"<{b} ms" for b in BUCKETS_MS] + [f"≥{BUCKETS_MS[-1]} ms"]
+        st.bar_chart(pd.DataFrame({"consultas":buckets}, index=labels))
+    if st.button("Reiniciar mediciones"):
+        metrics.reset()
+        st.success("Mediciones reiniciadas.")
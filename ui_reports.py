@@ -0,0 +1,71 @@
+# === Página Informes: informe por estudiante y lote por curso ===
+import streamlit as st
+import io, tempfile
+from db import q, all_years, read_conn
+from reports import build_course_zip, report_table, student_report
+from ui_common import get_scale
+
+COURSES_SQL = "SELECT id, name FROM courses WHERE year=:y ORDER BY name ASC"
+STUDENTS_SQL = """
+    SELECT DISTINCT st.id, st.first_name||' '||st.last_name AS nombre
+    FROM enrollments e JOIN students st ON st.id=e.student_id
+    WHERE e.year=:y
+    ORDER BY nombre ASC
+"""
+
+def ui_reports():
+    st.header("Informe para apoderado")
+    min_note, pass_pct, max_note = get_scale()
+
+    years = all_years()
+    if not years:
+        st.info("Registra matrículas primero.")
+        return
+    yr = st.selectbox("Año", years)
+
+    with st.expander("Informes por curso (lote, ZIP)", expanded=False):
+        courses = q(COURSES_SQL, {"y":int(yr)})
+        if courses.empty:
+            st.info("No hay cursos registrados ese año.")
+        else:
+            sel = st.multiselect("Cursos", courses["name"], default=list(courses["name"]))
+            with_html = st.checkbox("Incluir versión imprimible (HTML)")
+            ids = courses.loc[courses["name"].isin(sel), "id"].tolist()
+            scale, fmt = (min_note, pass_pct, max_note), "html" if with_html else "csv"
+
+            def make_zip():
+                # Se genera al hacer clic (descarga diferida), en un archivo temporal anónimo
+                # y no en memoria: Streamlit igual lo lee completo a bytes (no acepta
+                # generadores), pero así esa es la única copia. Sin búfer (RawIOBase, que
+                # Streamlit acepta); detach() vacía el BufferedWriter sin cerrar el archivo
+                raw = tempfile.TemporaryFile(buffering=0)
+                out = io.BufferedWriter(raw)
+                with read_conn(int(yr)) as conn:
+                    build_course_zip(conn, int(yr), ids, scale, fmt=fmt, dest=out)
+                out.detach()
+                return raw
+            st.download_button("Descargar informes (ZIP)", data=make_zip, disabled=not sel,
+                               file_name=f"informes_{yr}.zip", mime="application/zip")
+
+    students = q(STUDENTS_SQL, {"y":int(yr)}, year=int(yr))
+
+    if students.empty:
+        st.info("No hay estudiantes matriculados ese año.")
+        return
+
+    s_name = st.selectbox("Estudiante", students["nombre"])
+    s_id = int(students.loc[students["nombre"]==s_name,"id"].iloc[0])
+
+    por_asignatura = student_report(s_id, int(yr), (min_note, pass_pct, max_note))
+    if por_asignatura.empty:
+        st.info("Este estudiante aún no registra notas.")
+        return
+    promedio_general_nota = round(por_asignatura["nota_chilena"].mean(), 1)
+
+    st.subheader(f"Informe {s_name} - {yr}")
+    st.write(f"**Promedio general (nota): {promedio_general_nota}**")
+    st.dataframe(report_table(por_asignatura), use_container_width=True)
+
+    csv = report_table(por_asignatura).to_csv(index=False).encode("utf-8")
+    st.download_button("Descargar informe (CSV)", data=csv,
+                       file_name=f"informe_{s_name.replace(' ','_')}_{yr}.csv", mime="text/csv")
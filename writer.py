@@ -0,0 +1,239 @@
+# === Escritor único: cola de escrituras con group commit ===
+# Un hilo dedicado es dueño de la conexión de escritura; las sesiones envían
+# trabajos (funciones que reciben esa conexión) y esperan un Future. Así las
+# escrituras de muchas sesiones nunca compiten por el candado de SQLite.
+# Los trabajos pequeños que estén en la cola se agrupan en una transacción
+# (group commit): cada uno corre en su SAVEPOINT, de modo que el error de uno
+# no descarta a los demás, y todos se confirman con un único COMMIT. Los
+# trabajos exclusivos (importaciones) corren solos en su propia transacción.
+#
+# Uso:  python writer.py bench [--threads 16] [--writes 200] [--import-chunks 200]
+#       -> N sesiones escribiendo directo (cada una su transacción) vs. por la cola,
+#          opcionalmente con una importación grande en paralelo
+import argparse, os, queue, tempfile, threading, time
+from concurrent.futures import Future
+from instrument import Histogram
+
+_STOP = object()
+
+class _Job:
+    __slots__ = ("fn", "exclusive", "future", "t0")
+
+    def __init__(self, fn, exclusive):
+        self.fn = fn
+        self.exclusive = exclusive
+        self.future = Future()
+        self.t0 = time.perf_counter()
+
+class WriteQueue:
+    """Serializa escrituras en un hilo. `after(conn, committed)` corre tras cada transacción."""
+
+    def __init__(self, engine, after=None, max_batch=64, linger_s=0.0):
+        self.engine = engine
+        self.after = after
+        self.max_batch = max_batch
+        self.linger_s = linger_s
+        self._q = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.commit_ms = Histogram()
+        self.wait_ms = Histogram()
+        self.jobs = self.batches = self.failed = self.max_depth = 0
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+                    self._thread.start()
+
+    def submit(self, fn, exclusive=False):
+        """Encola `fn(conn)`; retorna un Future con su resultado (o su excepción)."""
+        self._ensure_thread()
+        job = _Job(fn, exclusive)
+        self._q.put(job)
+        depth = self._q.qsize()
+        with self._stats_lock:
+            self.max_depth = max(self.max_depth, depth)
+        return job.future
+
+    def run(self, fn, exclusive=False, timeout=None):
+        return self.submit(fn, exclusive).result(timeout)
+
+    def close(self, timeout=None):
+        if self._thread is not None:
+            self._q.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def depth(self):
+        return self._q.qsize()
+
+    def stats(self):
+        with self._stats_lock:
+            return {"cola":self._q.qsize(), "cola_max":self.max_depth, "trabajos":self.jobs,
+                    "commits":self.batches, "fallidos":self.failed,
+                    "por_commit":round(self.jobs / self.batches, 2) if self.batches else 0.0,
+                    "commit":self.commit_ms.snapshot(), "espera":self.wait_ms.snapshot()}
+
+    # --- Hilo escritor ---
+    def _next_batch(self, first):
+        batch, carry = [first], None
+        if first.exclusive:
+            return batch, carry
+        # Se agrupa lo que ya está en la cola (más lo que llegue en `linger_s`)
+        deadline = time.perf_counter() + self.linger_s
+        while len(batch) < self.max_batch:
+            try:
+                wait = deadline - time.perf_counter()
+                job = self._q.get(timeout=wait) if wait > 0 else self._q.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP or job.exclusive:
+                carry = job
+                break
+            batch.append(job)
+        return batch, carry
+
+    def _loop(self):
+        conn = self.engine.connect()
+        carry = None
+        try:
+            while True:
+                job = carry or self._q.get()
+                if job is _STOP:
+                    return
+                batch, carry = self._next_batch(job)
+                self._run_batch(conn, batch)
+        finally:
+            conn.close()
+
+    def _run_batch(self, conn, batch):
+        start = time.perf_counter()
+        batch = [j for j in batch if j.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        for j in batch:
+            self.wait_ms.add((start - j.t0) * 1000)
+        outcomes = []
+        committed = False
+        try:
+            with conn.begin():
+                for j in batch:
+                    # Un trabajo solo no necesita SAVEPOINT: si falla, se revierte todo
+                    if j.exclusive or len(batch) == 1:
+                        outcomes.append((j, j.fn(conn), None))
+                        continue
+                    sp = conn.begin_nested()
+                    try:
+                        result = j.fn(conn)
+                        sp.commit()
+                        outcomes.append((j, result, None))
+                    except Exception as e:
+                        sp.rollback()
+                        outcomes.append((j, None, e))
+                t_commit = time.perf_counter()
+            committed = True
+        except Exception as e:
+            # Falló un trabajo sin SAVEPOINT o el COMMIT: nada quedó escrito
+            for j in batch:
+                j.future.set_exception(e)
+            with self._stats_lock:
+                self.failed += len(batch)
+            return
+        finally:
+            if self.after is not None:
+                self.after(conn, committed)
+        self.commit_ms.add((time.perf_counter() - t_commit) * 1000)
+        with self._stats_lock:
+            self.jobs += len(batch)
+            self.batches += 1
+            self.failed += sum(e is not None for _, _, e in outcomes)
+        for j, result, e in outcomes:
+            if e is None:
+                j.future.set_result(result)
+            else:
+                j.future.set_exception(e)
+
+# --- Benchmark (línea de comandos) ---
+def bench(threads=16, writes=200, import_chunks=0, chunk_rows=5000):
+    """Escrituras pequeñas de `threads` sesiones, cada una con su transacción vs. por la cola.
+
+    Con `import_chunks`, una importación concurrente escribe ese número de bloques:
+    directo en una sola transacción larga (como antes), por la cola un trabajo por bloque."""
+    from sqlalchemy import text
+    from db import make_engine
+    path = os.path.join(tempfile.mkdtemp(prefix="writer_bench_"), "bench.db")
+    direct_engine = make_engine(path)
+    with direct_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t(id INTEGER PRIMARY KEY, who INTEGER, v REAL)"))
+        conn.execute(text("CREATE TABLE u(id INTEGER PRIMARY KEY, v REAL)"))
+    small = text("INSERT INTO t(who, v) VALUES(:w, :v)")
+    bulk = text("INSERT INTO u(v) VALUES(:v)")
+    rows = [{"v":float(i)} for i in range(chunk_rows)]
+    wq = WriteQueue(make_engine(path, writer=True))
+
+    def direct_write(w, i):
+        with direct_engine.begin() as conn:
+            conn.execute(small, {"w":w, "v":i})
+
+    def direct_import():
+        with direct_engine.begin() as conn:
+            for _ in range(import_chunks):
+                conn.execute(bulk, rows)
+
+    def queued_write(w, i):
+        wq.run(lambda conn: conn.execute(small, {"w":w, "v":i}))
+
+    def queued_import():
+        for _ in range(import_chunks):
+            wq.run(lambda conn: conn.execute(bulk, rows), exclusive=True)
+
+    out = {}
+    for name, write_one, import_all in (("directo", direct_write, direct_import),
+                                        ("cola", queued_write, queued_import)):
+        latency = Histogram(window=threads * writes)
+        errors = [0]
+        lock = threading.Lock()
+
+        def session(w):
+            # Cada sesión espera su escritura antes de la siguiente
+            for i in range(writes):
+                t = time.perf_counter()
+                try:
+                    write_one(w, i)
+                    latency.add((time.perf_counter() - t) * 1000)
+                except Exception:
+                    with lock:
+                        errors[0] += 1
+
+        t0 = time.perf_counter()
+        ts = [threading.Thread(target=session, args=(k,)) for k in range(threads)]
+        if import_chunks:
+            ts.append(threading.Thread(target=import_all))
+        for t in ts:
+            t.start()
+        for t in ts:
+            t.join()
+        snap = latency.snapshot()
+        out[name] = {"segundos":round(time.perf_counter() - t0, 3), "escrituras":threads * writes,
+                     "errores":errors[0], "p50_ms":snap["p50_ms"], "p95_ms":snap["p95_ms"],
+                     "max_ms":snap["max_ms"]}
+    st = wq.stats()
+    out["cola"].update(commits=st["commits"], por_commit=st["por_commit"], cola_max=st["cola_max"],
+                       commit_p95_ms=st["commit"]["p95_ms"])
+    wq.close()
+    return out
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Cola de escrituras con group commit.")
+    ap.add_argument("cmd", choices=["bench"])
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--writes", type=int, default=200)
+    ap.add_argument("--import-chunks", type=int, default=0,
+                    help="Bloques de una importación concurrente (0 = sin importación).")
+    ap.add_argument("--chunk-rows", type=int, default=5000)
+    args = ap.parse_args()
+    for name, r in bench(args.threads, args.writes, args.import_chunks, args.chunk_rows).items():
+        print(name, r)